@@ -0,0 +1,171 @@
+import argparse
+import fnmatch
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from cacheResultados import cache_padrao
+from exportacao import FORMATOS, exportar
+from instrumentacao import LOGGER, etapa, medir
+from motorAnalise import analisar_arquivos
+from regras import regras_atuais
+
+EXTENSOES = (".xlsx", ".xls", ".csv")
+
+# como cada arquivo de uma exportação é reconhecido pelo nome (sem distinção de maiúsculas);
+# a ordem importa: "supervisores" é testado antes de "alarmes"
+PADROES = {
+    "supervisores": "*supervisor*",
+    "medidas": "*medida*",
+    "placas": "*placa*",
+    "alarmes": "*alarme*",
+}
+
+
+def localizar_arquivos(pasta: str) -> dict:
+    arquivos = {}
+    for nome in sorted(os.listdir(pasta)):
+        if not nome.lower().endswith(EXTENSOES) or nome.startswith("~$"):
+            continue
+        for papel, padrao in PADROES.items():
+            if fnmatch.fnmatch(nome.lower(), padrao):
+                arquivos.setdefault(papel, os.path.join(pasta, nome))
+                break
+    return arquivos
+
+
+def processar_pasta(pasta: str, saida: str, header_linha: int = 2, formato: str = "xlsx",
+                    cache_linhas: str | None = None, arquivo_regras: str | None = None,
+                    nome: str | None = None) -> dict:
+    # `nome`: nome do relatório (sem extensão); padrão: o nome da pasta
+    arquivos = localizar_arquivos(pasta)
+    if "medidas" not in arquivos or "placas" not in arquivos:
+        raise ValueError("arquivos de medidas e de placas são obrigatórios")
+
+    regras = regras_atuais(arquivo_regras)
+    with medir(pasta) as medicao:
+        resultados = analisar_arquivos(
+            arquivos["medidas"], arquivos["placas"],
+            arquivos.get("alarmes"), arquivos.get("supervisores"),
+            header_linha=header_linha,
+            cache_linhas=cache_padrao(regras.versao, cache_linhas),
+            regras=regras,
+        )
+        extensao = ".xlsx" if formato == "xlsx" else f"_{formato}.zip"
+        nome = nome or os.path.basename(os.path.normpath(pasta))
+        destino = os.path.join(saida, f"{nome}{extensao}")
+        with etapa("exportacao", linhas=sum(len(df) for df in resultados)):
+            exportar(destino, formato, *resultados)
+
+    resultados_fec, placas_em_teste, sem_gerencia, supervisores = resultados
+    return {
+        "destino": destino,
+        "analise_fec": len(resultados_fec),
+        "placas_em_teste": len(placas_em_teste),
+        "sem_gerencia": len(sem_gerencia),
+        "supervisores": len(supervisores),
+        "segundos": medicao.total(),
+    }
+
+
+def listar_pastas(entradas: list, subpastas: bool) -> list:
+    pastas = []
+    for entrada in entradas:
+        if subpastas:
+            pastas.extend(
+                os.path.join(entrada, p) for p in sorted(os.listdir(entrada))
+                if os.path.isdir(os.path.join(entrada, p))
+            )
+        else:
+            pastas.append(entrada)
+    return pastas
+
+
+def nomes_relatorios(pastas: list) -> list:
+    # nome da pasta; se dois relatórios ficariam com o mesmo nome (ex.: siteA/2026-10-01 e
+    # siteB/2026-10-01), usa o caminho a partir da raiz comum, com "_" no lugar das barras
+    absolutas = [os.path.abspath(p) for p in pastas]
+    if len(set(absolutas)) != len(absolutas):
+        raise ValueError("a mesma pasta foi informada mais de uma vez")
+    nomes = [os.path.basename(p) for p in absolutas]
+    if len(set(n.lower() for n in nomes)) == len(nomes):
+        return nomes
+    raiz = os.path.commonpath([os.path.dirname(p) for p in absolutas])
+    return [os.path.relpath(p, raiz).replace(os.sep, "_") for p in absolutas]
+
+
+def _configurar_log(desempenho: bool):
+    # executado em cada processo do pool: as métricas das etapas saem como JSON, uma por linha
+    if desempenho:
+        saida = logging.StreamHandler(sys.stderr)
+        saida.setFormatter(logging.Formatter("%(message)s"))
+        LOGGER.addHandler(saida)
+        LOGGER.setLevel(logging.INFO)
+        LOGGER.propagate = False
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Executa a análise das planilhas em lote, sem a interface do Streamlit."
+    )
+    parser.add_argument("pastas", nargs="+", help="pastas com os arquivos exportados de um site/dia")
+    parser.add_argument("-o", "--saida", default="resultados", help="pasta onde os relatórios são gravados")
+    parser.add_argument("--subpastas", action="store_true",
+                        help="trata cada subpasta das pastas informadas como uma exportação")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="número de processos em paralelo")
+    parser.add_argument("--cabecalho", type=int, default=2,
+                        help="linha (0 = primeira) com os nomes das colunas")
+    parser.add_argument("-f", "--formato", choices=list(FORMATOS), default="xlsx",
+                        help="formato do relatório (csv/parquet geram um .zip com um arquivo por tabela)")
+    parser.add_argument("--cache-linhas", metavar="ARQUIVO.sqlite", default=None,
+                        help="reaproveita a classificação das linhas já vistas em execuções anteriores")
+    parser.add_argument("--regras", metavar="ARQUIVO.json", default=None,
+                        help="arquivo de regras da análise (padrão: REGRAS_ARQUIVO ou regras.json)")
+    parser.add_argument("--desempenho", action="store_true",
+                        help="registra o tempo, as linhas e a memória de cada etapa (JSON, no stderr)")
+    args = parser.parse_args(argv)
+
+    # erro no arquivo de regras aparece uma vez, antes de abrir o pool
+    try:
+        regras_atuais(args.regras)
+    except (OSError, ValueError) as e:
+        print(f"ERRO  regras: {e}", file=sys.stderr)
+        return 2
+
+    os.makedirs(args.saida, exist_ok=True)
+    pastas = listar_pastas(args.pastas, args.subpastas)
+    try:
+        nomes = nomes_relatorios(pastas)
+    except ValueError as e:
+        print(f"ERRO  {e}", file=sys.stderr)
+        return 2
+    falhas = 0
+
+    with ProcessPoolExecutor(max_workers=max(1, args.workers), initializer=_configurar_log,
+                             initargs=(args.desempenho,)) as pool:
+        futuros = {
+            pool.submit(processar_pasta, p, args.saida, args.cabecalho, args.formato, args.cache_linhas,
+                        args.regras, nome): p
+            for p, nome in zip(pastas, nomes)
+        }
+        for fut in as_completed(futuros):
+            pasta = futuros[fut]
+            try:
+                r = fut.result()
+                print(
+                    f"OK    {pasta}: {r['analise_fec']} FEC, {r['placas_em_teste']} em teste, "
+                    f"{r['sem_gerencia']} sem gerência, {r['supervisores']} supervisores "
+                    f"em {r['segundos']:.1f}s -> {r['destino']}"
+                )
+            except Exception as e:
+                falhas += 1
+                print(f"ERRO  {pasta}: {e}", file=sys.stderr)
+
+    print(f"{len(pastas) - falhas}/{len(pastas)} exportações processadas.")
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,11 @@
 
 import streamlit as st
 from uploadPlanilha import upload_page
-from analiseDados import analysis_page
+from analiseDados import analysis_page, retomar_analise
 
 if "pagina" not in st.session_state:
-    st.session_state.pagina = "upload"
+    # sessão nova; se a URL traz uma análise em andamento (página recarregada), volta para ela
+    st.session_state.pagina = "opcoes" if retomar_analise() else "upload"
 
 if st.session_state.pagina == "upload":
     upload_page()
@@ -0,0 +1,174 @@
+import argparse
+import io
+import json
+import multiprocessing
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+from dadosSinteticos import gerar_exportacao, gravar_exportacao
+from exportacao import exportar
+from instrumentacao import etapa, medir
+from motorAnalise import analisar_arquivos
+from normalizacao import _norm_text, _norm_texto_str, _strip_accents, normalizar_serie
+
+
+def _norm_text_original(s) -> str:
+    # implementação anterior (sem cache e com re.sub a cada chamada), usada como referência
+    if s is None or (isinstance(s, float) and pd.isna(s)):
+        return ""
+    s = unicodedata.normalize("NFKD", str(s)).encode("ASCII", "ignore").decode("ASCII").upper()
+    s = re.sub(r"\s+", "", s)
+    s = re.sub(r"[^A-Z0-9()]", "", s)
+    return s
+
+
+def cronometrar(fn, repeticoes: int = 3) -> float:
+    # melhor tempo (s) entre as repetições
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        fn()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def bench_normalizacao(linhas: int = 1_000_000, cardinalidade: int = 1_000, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    distintos = np.array([f"Sér-{i:05d} Ção" for i in range(cardinalidade)], dtype=object)
+    serie = pd.Series(distintos[rng.integers(0, cardinalidade, linhas)])
+
+    def com_cache_frio():
+        _norm_texto_str.cache_clear()
+        _strip_accents.cache_clear()
+        serie.apply(_norm_text)
+
+    tempos = {
+        "apply(original)": cronometrar(lambda: serie.apply(_norm_text_original), repeticoes=1),
+        "apply(_norm_text com cache)": cronometrar(com_cache_frio),
+        "normalizar_serie": cronometrar(lambda: normalizar_serie(serie)),
+    }
+    assert normalizar_serie(serie).equals(serie.apply(_norm_text_original))
+    return tempos
+
+
+# preparo dos dados sintéticos: medido, mas fora do total e da comparação
+ETAPAS_PREPARO = ["geracao", "gravacao"]
+
+
+def bench_analise(linhas: int = 100_000, seed: int = 0, formato_arquivo: str = "csv",
+                  formato_relatorio: str = "parquet", rastrear_memoria: bool = False) -> pd.DataFrame:
+    # análise completa de uma exportação sintética gravada em disco (sem cache de linhas);
+    # geração e gravação também são medidas, mas ficam fora do total da análise
+    if rastrear_memoria:
+        tracemalloc.start()
+    with tempfile.TemporaryDirectory() as pasta, medir(f"analise {linhas}") as medicao:
+        with etapa("geracao", linhas=linhas):
+            frames = gerar_exportacao(linhas, seed)
+        with etapa("gravacao", linhas=sum(len(df) for df in frames)):
+            caminhos = gravar_exportacao(pasta, frames, formato_arquivo)
+        del frames
+        resultados = analisar_arquivos(*caminhos, cache_linhas=None)
+        with etapa("exportacao", linhas=sum(len(df) for df in resultados)):
+            exportar(io.BytesIO(), formato_relatorio, *resultados)
+    if rastrear_memoria:
+        tracemalloc.stop()
+    tabela = medicao.tabela()
+    tabela.insert(0, "entrada", linhas)
+    return tabela
+
+
+def _em_processo_novo(fn, *args, **kwargs):
+    # cada tamanho roda num processo limpo: o pico de memória de um não contamina o próximo
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(fn, *args, **kwargs).result()
+
+
+def comparar(atual: pd.DataFrame, base: pd.DataFrame, tolerancia: float = 0.2,
+             minimo_s: float = 0.05) -> pd.DataFrame:
+    # etapas da análise que ficaram mais de `tolerancia` mais lentas que na base (ignora as muito curtas)
+    atual = atual[~atual["etapa"].isin(ETAPAS_PREPARO)]
+    juntos = atual.merge(base, on=["entrada", "etapa"], suffixes=("", "_base"))
+    juntos["variacao"] = juntos["segundos"] / juntos["segundos_base"] - 1
+    lentas = (juntos["variacao"] > tolerancia) & (juntos["segundos"] >= minimo_s)
+    return juntos.loc[lentas, ["entrada", "etapa", "segundos_base", "segundos", "variacao"]]
+
+
+def _imprimir(titulo: str, tempos: dict):
+    base = next(iter(tempos.values()))
+    print(titulo)
+    for nome, t in tempos.items():
+        print(f"  {nome:<32} {t * 1000:10.1f} ms   {base / t:6.1f}x")
+
+
+def _imprimir_etapas(tabela: pd.DataFrame):
+    print(f"Análise de {tabela['entrada'].iloc[0]:,} linhas")
+    for r in tabela.itertuples():
+        linhas = "" if pd.isna(r.linhas) else f"{int(r.linhas):>12,} linhas"
+        memoria = "" if pd.isna(r.memoria_pico_mb) else f"{r.memoria_pico_mb:10.1f} MB"
+        print(f"  {r.etapa:<24} {r.segundos:10.3f} s {linhas:>19} {memoria}")
+    analise = tabela[~tabela["etapa"].isin(ETAPAS_PREPARO)]
+    print(f"  {'total da análise':<24} {analise['segundos'].sum():10.3f} s")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de desempenho da análise.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("normalizacao", help="normalização de texto: implementação anterior x atual")
+    p.add_argument("--linhas", type=int, default=1_000_000)
+    p.add_argument("--cardinalidade", type=int, default=1_000)
+
+    p = sub.add_parser("analise", help="tempo e memória de cada etapa da análise com dados sintéticos")
+    p.add_argument("--linhas", type=int, nargs="+", default=[10_000, 100_000, 1_000_000],
+                   help="tamanhos do arquivo de medidas (ex.: 10000 100000 1000000 10000000)")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--entrada", choices=["csv", "xlsx"], default="csv", help="formato dos arquivos gerados")
+    p.add_argument("--relatorio", choices=["xlsx", "csv", "parquet"], default="parquet")
+    p.add_argument("--tracemalloc", action="store_true",
+                   help="pico de memória por etapa (mais preciso e mais lento que o pico de RSS)")
+    p.add_argument("--salvar", metavar="ARQUIVO.json", help="grava as medições para comparar depois")
+    p.add_argument("--comparar", metavar="ARQUIVO.json", help="medições de referência (gravadas com --salvar)")
+    p.add_argument("--tolerancia", type=float, default=0.2,
+                   help="aumento de tempo aceito em relação à referência (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    if args.comando == "normalizacao":
+        _imprimir(
+            f"Normalização de texto ({args.linhas:,} linhas, {args.cardinalidade:,} valores distintos)",
+            bench_normalizacao(args.linhas, args.cardinalidade),
+        )
+        return 0
+
+    tabelas = []
+    for linhas in args.linhas:
+        tabela = _em_processo_novo(
+            bench_analise, linhas, args.seed, args.entrada, args.relatorio, args.tracemalloc
+        )
+        _imprimir_etapas(tabela)
+        tabelas.append(tabela)
+    medicoes = pd.concat(tabelas, ignore_index=True)
+
+    if args.salvar:
+        with open(args.salvar, "w", encoding="utf-8") as f:
+            json.dump(medicoes.to_dict(orient="records"), f, ensure_ascii=False, indent=1)
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = pd.DataFrame(json.load(f))
+        lentas = comparar(medicoes, base, args.tolerancia)
+        if not lentas.empty:
+            print("Etapas mais lentas que a referência:", file=sys.stderr)
+            print(lentas.to_string(index=False), file=sys.stderr)
+            return 1
+        print("Sem regressões em relação à referência.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+import hashlib
+import io
+import json
+import os
+import multiprocessing
+import threading
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from cachetools import LRUCache
+from utils import carregar_arquivo, _extensao, _tipo_texto
+
+# Orçamento de memória (MB) do cache de planilhas já lidas
+CACHE_MEMORIA_MB = int(os.environ.get("CACHE_PLANILHAS_MB", "1024"))
+# Diretório opcional para guardar as planilhas em Parquet (vazio = desativado)
+CACHE_DIR = os.environ.get("CACHE_PLANILHAS_DIR", "")
+# Tamanho máximo (MB) do diretório; os arquivos usados há mais tempo saem primeiro
+CACHE_DIR_MB = int(os.environ.get("CACHE_PLANILHAS_DIR_MB", "4096"))
+# Arquivos a partir deste tamanho são lidos em outro processo; menores usam threads
+LIMIAR_PROCESSO_BYTES = int(os.environ.get("CACHE_PLANILHAS_LIMIAR_PROCESSO", str(5 * 1024 * 1024)))
+MAX_PROCESSOS = min(4, os.cpu_count() or 1)
+# metadado do Parquet com as posições das colunas de tipos mistos (gravadas como JSON)
+_META_MISTAS = b"comparandoxlsx.mistas"
+
+
+def _tamanho_df(df: pd.DataFrame) -> int:
+    try:
+        return int(df.memory_usage(deep=True).sum())
+    except Exception:
+        return 1
+
+
+# LRU limitado por bytes: as planilhas menos usadas saem primeiro
+_cache = LRUCache(maxsize=CACHE_MEMORIA_MB * 1024 * 1024, getsizeof=_tamanho_df)
+_lock = threading.Lock()
+_processos = None
+
+
+def _ler_bytes(arquivo) -> bytes:
+    if isinstance(arquivo, (str, os.PathLike)):
+        with open(arquivo, "rb") as f:
+            return f.read()
+    if hasattr(arquivo, "getvalue"):
+        return arquivo.getvalue()
+    arquivo.seek(0)
+    dados = arquivo.read()
+    arquivo.seek(0)
+    return dados
+
+
+def chave_arquivo(dados: bytes, header_linha: int, ext: str = "") -> str:
+    h = hashlib.sha256(dados)
+    h.update(f"|header={header_linha}|ext={ext}".encode())
+    return h.hexdigest()
+
+
+def _caminho_disco(chave: str) -> str | None:
+    if not CACHE_DIR:
+        return None
+    return os.path.join(CACHE_DIR, f"{chave}.parquet")
+
+
+def _limitar_disco():
+    # remove os arquivos usados há mais tempo (mtime, atualizado a cada leitura) até caber no limite
+    try:
+        arquivos = []
+        for entrada in os.scandir(CACHE_DIR):
+            if entrada.name.endswith(".parquet"):
+                info = entrada.stat()
+                arquivos.append((info.st_mtime, info.st_size, entrada.path))
+    except OSError:
+        return
+    excesso = sum(t for _, t, _ in arquivos) - CACHE_DIR_MB * 1024 * 1024
+    for _, tamanho, caminho in sorted(arquivos):
+        if excesso <= 0:
+            break
+        try:
+            os.remove(caminho)
+            excesso -= tamanho
+        except OSError:
+            pass
+
+
+def _mistas(df: pd.DataFrame) -> list:
+    # colunas object com números e texto (ex.: "Valor" lido do Excel), que o Parquet não aceita
+    return [
+        i for i, tipo in enumerate(df.dtypes)
+        if tipo == object and pd.api.types.infer_dtype(df.iloc[:, i], skipna=True) not in ("string", "empty")
+    ]
+
+
+def _para_tabela(df: pd.DataFrame) -> pa.Table:
+    # cada valor das colunas mistas vira JSON (1.5 -> "1.5", "0,3" -> '"0,3"'): o tipo de cada
+    # célula volta na leitura; as posições ficam no metadado do arquivo
+    mistas = _mistas(df)
+    if mistas:
+        df = df.copy(deep=False)
+        for i in mistas:
+            df.isetitem(i, df.iloc[:, i].map(json.dumps))
+    tabela = pa.Table.from_pandas(df, preserve_index=True)
+    metadados = dict(tabela.schema.metadata or {})
+    metadados[_META_MISTAS] = json.dumps(mistas).encode()
+    return tabela.replace_schema_metadata(metadados)
+
+
+def _de_tabela(tabela: pa.Table) -> pd.DataFrame:
+    # o pd.read_parquet devolveria o texto como string[python]; mantém string[pyarrow]
+    df = tabela.to_pandas(types_mapper=_tipo_texto)
+    for i in json.loads((tabela.schema.metadata or {}).get(_META_MISTAS, b"[]")):
+        # sem inferência de tipo: 1 e 1.5 na mesma coluna continuam int e float
+        df.isetitem(i, pd.Series([json.loads(v) for v in df.iloc[:, i]], index=df.index, dtype=object))
+    return df
+
+
+def _gravar_disco(chave: str, df: pd.DataFrame):
+    caminho = _caminho_disco(chave)
+    if caminho is None or os.path.exists(caminho):
+        return
+    # nome temporário único: gravações simultâneas da mesma chave não se misturam
+    tmp = f"{caminho}.{uuid.uuid4().hex}.tmp"
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        pq.write_table(_para_tabela(df), tmp)
+        os.replace(tmp, caminho)
+    except Exception:
+        # valores que nem o JSON representa (ex.: datas no meio de texto); fica só em memória
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return
+    _limitar_disco()
+
+
+def _ler_disco(chave: str) -> pd.DataFrame | None:
+    caminho = _caminho_disco(chave)
+    if caminho is None or not os.path.exists(caminho):
+        return None
+    try:
+        df = _de_tabela(pq.read_table(caminho))
+        os.utime(caminho)  # marca como usado recentemente (ver _limitar_disco)
+        return df
+    except Exception:
+        return None
+
+
+def _consultar(chave: str) -> pd.DataFrame | None:
+    with _lock:
+        df = _cache.get(chave)
+    if df is None:
+        df = _ler_disco(chave)
+        if df is not None:
+            _guardar(chave, df, disco=False)
+    return df
+
+
+def _guardar(chave: str, df: pd.DataFrame, disco: bool = True):
+    if disco:
+        _gravar_disco(chave, df)
+    with _lock:
+        try:
+            _cache[chave] = df
+        except ValueError:
+            # maior que o orçamento inteiro de memória: não guarda
+            pass
+
+
+def _ler_dados(dados: bytes, header_linha: int, ext: str) -> pd.DataFrame:
+    # função de topo para poder rodar em outro processo; sem projeção de colunas: a prévia
+    # ("Visualizar dados") mostra todas e a mesma cópia em cache atende prévia e análise
+    return carregar_arquivo(io.BytesIO(dados), header_linha=header_linha, nome=f"arquivo{ext}")
+
+
+def _copia(df: pd.DataFrame, chave: str) -> pd.DataFrame:
+    # cópia rasa: as colunas são compartilhadas com o cache (a análise não altera a entrada);
+    # a chave de conteúdo acompanha o DataFrame para outros caches (ex.: prévia paginada)
+    copia = df.copy(deep=False)
+    copia.attrs["chave_arquivo"] = chave
+    return copia
+
+
+def _pool_processos() -> ProcessPoolExecutor:
+    global _processos
+    with _lock:
+        if _processos is None:
+            # "spawn" evita herdar as threads do servidor do Streamlit no fork
+            _processos = ProcessPoolExecutor(
+                max_workers=MAX_PROCESSOS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _processos
+
+
+def _descartar_pool(pool: ProcessPoolExecutor):
+    # um processo filho morreu (ex.: falta de memória) e o pool não aceita mais tarefas;
+    # a próxima leitura grande cria outro
+    global _processos
+    with _lock:
+        if _processos is pool:
+            _processos = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+# lê vários arquivos com cache por conteúdo (SHA-256 dos bytes + linha de cabeçalho); os que
+# não estão no cache são lidos em paralelo: os grandes vão para um pool de processos (parse do Excel
+# é CPU-bound) e os pequenos para threads; se o pool de processos quebrar, o arquivo é lido numa
+# thread. Cada arquivo tem seu próprio tratamento de erro:
+# o resultado é o DataFrame ou a exceção daquele arquivo. `ao_concluir(nome, feitos, total)`
+# é chamado a cada arquivo terminado (progresso na interface).
+def ler_planilhas(arquivos: dict, header_linha: int = 2, ao_concluir=None) -> dict:
+    resultados, pendentes = {}, {}
+    for nome, arquivo in arquivos.items():
+        try:
+            dados = _ler_bytes(arquivo)
+            ext = _extensao(arquivo)
+            chave = chave_arquivo(dados, header_linha, ext)
+            df = _consultar(chave)
+            if df is not None:
+                resultados[nome] = _copia(df, chave)
+            else:
+                pendentes[nome] = (chave, dados, ext)
+        except Exception as e:
+            resultados[nome] = e
+
+    total, feitos = len(arquivos), 0
+    for nome in resultados:
+        feitos += 1
+        if ao_concluir:
+            ao_concluir(nome, feitos, total)
+
+    if pendentes:
+        with ThreadPoolExecutor(max_workers=len(pendentes)) as threads:
+            def enviar(nome, processo=True):
+                chave, dados, ext = pendentes[nome]
+                if processo and len(dados) >= LIMIAR_PROCESSO_BYTES and MAX_PROCESSOS > 1:
+                    pool = _pool_processos()
+                    try:
+                        futuros[pool.submit(_ler_dados, dados, header_linha, ext)] = (nome, pool)
+                        return
+                    except BrokenProcessPool:
+                        _descartar_pool(pool)
+                futuros[threads.submit(_ler_dados, dados, header_linha, ext)] = (nome, None)
+
+            futuros = {}
+            for nome in pendentes:
+                enviar(nome)
+
+            while futuros:
+                prontos, _ = wait(futuros, return_when=FIRST_COMPLETED)
+                for fut in prontos:
+                    nome, pool = futuros.pop(fut)
+                    chave = pendentes[nome][0]
+                    try:
+                        df = fut.result()
+                        _guardar(chave, df)
+                        resultados[nome] = _copia(df, chave)
+                    except BrokenProcessPool:
+                        _descartar_pool(pool)
+                        enviar(nome, processo=False)
+                        continue
+                    except Exception as e:
+                        resultados[nome] = e
+                    feitos += 1
+                    if ao_concluir:
+                        ao_concluir(nome, feitos, total)
+    return resultados
+
+
+def limpar_cache():
+    with _lock:
+        _cache.clear()
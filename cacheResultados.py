@@ -0,0 +1,153 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+# Banco SQLite com o resultado por linha das últimas análises (vazio = desativado)
+CACHE_RESULTADOS_DB = os.environ.get("CACHE_RESULTADOS_DB", "")
+# Quantidade máxima de linhas guardadas; as usadas há mais tempo saem primeiro
+LIMITE_LINHAS = int(os.environ.get("CACHE_RESULTADOS_LIMITE", "5000000"))
+
+# parâmetros por consulta (abaixo do limite de 999 das versões antigas do SQLite)
+TAMANHO_CONSULTA = 900
+
+COLUNAS = ["_DETECTED_DEVICE_", "_DETECTED_RAW_", "Análise de FEC", "elegivel"]
+
+
+def impressao_linhas(df: pd.DataFrame, colunas: list) -> np.ndarray:
+    # impressão digital (64 bits) de cada linha a partir das colunas que definem o resultado
+    return pd.util.hash_pandas_object(df[colunas], index=False).to_numpy().view(np.int64)
+
+
+class CacheLinhas:
+    # resultado da detecção/classificação por impressão digital da linha; o conteúdo é
+    # descartado quando a versão das regras muda. `uso` é o número da última análise que
+    # gravou ou encontrou a linha (ordem de descarte quando passa de LIMITE_LINHAS)
+
+    def __init__(self, caminho: str, versao: str):
+        self.caminho = caminho
+        self.versao = versao
+        self._lock = threading.Lock()
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        with self._conectar() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor TEXT)")
+            colunas = {c[1] for c in con.execute("PRAGMA table_info(linhas)")}
+            if colunas and "uso" not in colunas:
+                # banco de uma versão anterior (sem a ordem de uso): é só cache, recomeça vazio
+                con.execute("DROP TABLE linhas")
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS linhas ("
+                " impressao INTEGER PRIMARY KEY, dispositivo TEXT, bruto TEXT,"
+                " analise TEXT, elegivel INTEGER, uso INTEGER NOT NULL)"
+            )
+            con.execute("CREATE INDEX IF NOT EXISTS linhas_uso ON linhas (uso)")
+            atual = con.execute("SELECT valor FROM meta WHERE chave = 'versao'").fetchone()
+            if atual is None or atual[0] != versao:
+                con.execute("DELETE FROM linhas")
+                con.execute("INSERT OR REPLACE INTO meta VALUES ('versao', ?)", (versao,))
+
+    @contextmanager
+    def _conectar(self):
+        con = sqlite3.connect(self.caminho, timeout=30)
+        try:
+            with con:  # commit ao final (rollback se der erro)
+                yield con
+        finally:
+            con.close()
+
+    def _proximo_uso(self) -> int:
+        # contador compartilhado por todos os processos que usam o banco
+        with self._conectar() as con:
+            con.execute(
+                "INSERT INTO meta VALUES ('uso', '1')"
+                " ON CONFLICT (chave) DO UPDATE SET valor = CAST(valor AS INTEGER) + 1"
+            )
+            return int(con.execute("SELECT valor FROM meta WHERE chave = 'uso'").fetchone()[0])
+
+    def _consultar(self, impressoes: np.ndarray, uso: int) -> pd.DataFrame:
+        # só as impressões desta análise, em blocos de IN (...), sem trazer o banco inteiro
+        # para a memória; em ordem, as buscas percorrem a chave primária sequencialmente.
+        # As linhas encontradas passam a ter o `uso` desta análise
+        unicas = np.sort(pd.unique(impressoes))
+        linhas = []
+        with self._conectar() as con:
+            for inicio in range(0, len(unicas), TAMANHO_CONSULTA):
+                bloco = unicas[inicio:inicio + TAMANHO_CONSULTA].tolist()
+                filtro = f" WHERE impressao IN ({','.join('?' * len(bloco))})"
+                linhas.extend(con.execute(
+                    "SELECT impressao, dispositivo, bruto, analise, elegivel FROM linhas" + filtro, bloco,
+                ).fetchall())
+                con.execute("UPDATE linhas SET uso = ?" + filtro, [uso] + bloco)
+        encontradas = pd.DataFrame(linhas, columns=["impressao"] + COLUNAS).set_index("impressao")
+        encontradas["elegivel"] = encontradas["elegivel"].astype(bool)
+        return encontradas
+
+    def _gravar(self, novas: pd.DataFrame, uso: int):
+        # em ordem de impressão, a inserção na chave primária é sequencial
+        novas = novas.sort_index()
+        with self._conectar() as con:
+            con.executemany(
+                "INSERT OR REPLACE INTO linhas VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    (int(i), d, b, a, int(e), uso)
+                    for i, d, b, a, e in zip(
+                        novas.index, novas["_DETECTED_DEVICE_"], novas["_DETECTED_RAW_"],
+                        novas["Análise de FEC"], novas["elegivel"],
+                    )
+                ),
+            )
+            excesso = con.execute("SELECT COUNT(*) FROM linhas").fetchone()[0] - LIMITE_LINHAS
+            if excesso > 0:
+                con.execute(
+                    "DELETE FROM linhas WHERE impressao IN"
+                    " (SELECT impressao FROM linhas ORDER BY uso LIMIT ?)",
+                    (excesso,),
+                )
+
+    def classificar(self, df: pd.DataFrame, impressoes: np.ndarray, calcular) -> pd.DataFrame:
+        # reaproveita o resultado das linhas já vistas e só chama `calcular` para as novas/alteradas
+        uso = self._proximo_uso()
+        encontradas = self._consultar(impressoes, uso)
+        posicoes = encontradas.index.get_indexer(impressoes)
+        novas = posicoes < 0
+
+        if len(encontradas):
+            resultado = encontradas.iloc[np.where(novas, 0, posicoes)]
+        else:
+            resultado = pd.DataFrame({
+                "_DETECTED_DEVICE_": None, "_DETECTED_RAW_": None, "Análise de FEC": "", "elegivel": False,
+            }, index=range(len(df)))
+        resultado = resultado.set_axis(df.index)
+
+        if novas.any():
+            calculadas = calcular(df[novas])
+            resultado = resultado.astype({"elegivel": bool})
+            for col in COLUNAS:
+                resultado.loc[novas, col] = calculadas[col].to_numpy()
+            registros = calculadas.set_axis(impressoes[novas])
+            with self._lock:
+                self._gravar(registros[~registros.index.duplicated()], uso)
+        return resultado
+
+
+_caches = {}
+_lock = threading.Lock()
+
+
+def cache_padrao(versao: str, caminho: str | None = None) -> CacheLinhas | None:
+    # um cache por processo para o banco informado ou o de CACHE_RESULTADOS_DB (None se desativado);
+    # só a versão atual das regras fica guardada
+    caminho = caminho or CACHE_RESULTADOS_DB
+    if not caminho:
+        return None
+    with _lock:
+        cache = _caches.get(caminho)
+        if cache is None or cache.versao != versao:
+            # regras novas: o cache da versão anterior deixa de ser usado e sai daqui
+            cache = _caches[caminho] = CacheLinhas(caminho, versao)
+        return cache
@@ -0,0 +1,172 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+from regras import regras_atuais
+
+# Exportações sintéticas (medidas, placas, alarmes e supervisores) com as mesmas colunas e
+# textos das reais, para benchmarks e testes de carga. A mesma seed gera sempre os mesmos dados.
+
+# medidas por placa (portas/comprimentos de onda) e placas por site
+MEDIDAS_POR_PLACA = 8
+PLACAS_POR_SITE = 40
+
+TIPOS = [
+    "xFEC 7%", "Reed Solomon", "Pré-FEC BER", "pré-fec", "FEC", "Taxa de FEC", "Taxa FEC corrigido",
+    "ND", "nd fec", "Potência RX", "Temperatura",
+]
+PESOS_TIPOS = [0.1, 0.08, 0.12, 0.1, 0.12, 0.12, 0.06, 0.06, 0.04, 0.12, 0.08]
+
+ALARMES_COMUNS = ["Perda de sinal (LOS)", "Temperatura alta", "Falha de ventilador", "Potência RX baixa"]
+PLACAS_COMUNS = ["SPVL-2", "OTU-4", "FAN", "PSU-A"]
+
+# colunas com o mesmo nome das exportações do gerenciador
+COLUNA_SERIE_MEDIDAS = "Número de Série"
+COLUNA_SERIE_PLACAS = "Numero de Serie"
+
+
+def _texto(valores) -> pd.Series:
+    return pd.Series(valores).astype(str)
+
+
+def _escolher(rng, valores, n: int, pesos=None) -> np.ndarray:
+    valores = np.asarray(valores, dtype=object)
+    if pesos is not None:
+        pesos = np.asarray(pesos, dtype=float) / np.sum(pesos)
+    return valores[rng.choice(len(valores), size=n, p=pesos)]
+
+
+def _placas(rng, n: int) -> pd.DataFrame:
+    # uma linha por placa: site, dispositivo, número após "#" e serial
+    dispositivos = list(regras_atuais().dispositivos)
+    site = _texto(rng.integers(0, max(1, n // PLACAS_POR_SITE), n)).str.zfill(5)
+    dispositivo = _escolher(rng, dispositivos, n)
+    numero = _texto(rng.integers(1, 33, n))
+    return pd.DataFrame({
+        "site": "SITE" + site,
+        "dispositivo": dispositivo,
+        "numero": numero,
+        "serial": "SN" + _texto(np.arange(n)).str.zfill(9),
+    })
+
+
+def _valores(rng, n: int) -> np.ndarray:
+    # ~12% zeros (numéricos e texto), ~5% com vírgula decimal e o resto entre 1e-9 e 1e-2
+    valores = (10.0 ** rng.uniform(-9, -2, n)).astype(object)
+    sorteio = rng.random(n)
+    valores[sorteio < 0.08] = 0
+    valores[(sorteio >= 0.08) & (sorteio < 0.12)] = "0"
+    virgula = (sorteio >= 0.12) & (sorteio < 0.17)
+    valores[virgula] = pd.Series(valores[virgula]).map(lambda v: f"{v:.2e}".replace(".", ",")).to_numpy()
+    return valores
+
+
+def gerar_medidas(placas: pd.DataFrame, linhas: int, rng) -> pd.DataFrame:
+    idx = rng.integers(0, len(placas), linhas)
+    p = placas.iloc[idx]
+    nome = ("NE-" + p["site"] + "-" + p["dispositivo"] + " #" + p["numero"]).to_numpy()
+    porta = _texto(rng.integers(1, 17, linhas)).to_numpy()
+    return pd.DataFrame({
+        "Nome": nome,
+        "Porta": porta,
+        "Valor": _valores(rng, linhas),
+        "Tipo": _escolher(rng, TIPOS, linhas, PESOS_TIPOS),
+        COLUNA_SERIE_MEDIDAS: p["serial"].to_numpy(),
+        "Unidade": "",
+    })
+
+
+def gerar_inventario(placas: pd.DataFrame, rng, em_teste: float = 0.03) -> pd.DataFrame:
+    n = len(placas)
+    # o serial vem com outra formatação (minúsculas e hífen) no inventário
+    serial = placas["serial"].str.lower().str.replace("sn", "sn-", n=1, regex=False)
+    return pd.DataFrame({
+        COLUNA_SERIE_PLACAS: serial.to_numpy(),
+        "Em Teste": np.where(rng.random(n) < em_teste, "Sim", "Não"),
+        "Placa": (placas["site"] + "/" + placas["dispositivo"] + " #" + placas["numero"]).to_numpy(),
+        "Alarme": "",
+    })
+
+
+def gerar_alarmes(placas: pd.DataFrame, rng, fracao: float = 0.05, criticos: float = 0.6) -> pd.DataFrame:
+    n = max(1, int(len(placas) * fracao))
+    p = placas.iloc[rng.integers(0, len(placas), n)]
+    # textos críticos em grafias variadas, como chegam do gerenciador
+    criticos_regras = regras_atuais().alarmes_criticos
+    textos_criticos = [a.title() for a in criticos_regras] + [f"{criticos_regras[-1].title()} (SC)"]
+    alarme = np.where(
+        rng.random(n) < criticos,
+        _escolher(rng, textos_criticos, n),
+        _escolher(rng, ALARMES_COMUNS, n),
+    )
+    return pd.DataFrame({
+        "Placa:": (p["site"] + "/" + p["dispositivo"] + " #" + p["numero"]).to_numpy(),
+        "Alarme:": alarme,
+        "Severidade": _escolher(rng, ["Crítico", "Maior", "Menor"], n),
+    })
+
+
+def gerar_supervisores(placas: pd.DataFrame, rng, por_site: int = 3) -> pd.DataFrame:
+    sites = placas["site"].unique()
+    n = max(1, len(sites) * por_site)
+    regras = regras_atuais()
+    alarmes = [a.title() for a in regras.alarmes_site_sem_gerencia + regras.alarmes_dcn] + ALARMES_COMUNS
+    return pd.DataFrame({
+        "NE": "NE-" + pd.Series(sites[rng.integers(0, len(sites), n)]),
+        "Placa": _escolher(rng, list(regras.placas_supervisor) + PLACAS_COMUNS, n),
+        "Alarme": _escolher(rng, alarmes, n),
+    })
+
+
+def gerar_exportacao(linhas: int = 100_000, seed: int = 0) -> tuple:
+    # (medidas, placas, alarmes, supervisores) na ordem esperada por motorAnalise.analisar
+    rng = np.random.default_rng(seed)
+    placas = _placas(rng, max(1, linhas // MEDIDAS_POR_PLACA))
+    return (
+        gerar_medidas(placas, linhas, rng),
+        gerar_inventario(placas, rng),
+        gerar_alarmes(placas, rng),
+        gerar_supervisores(placas, rng),
+    )
+
+
+ARQUIVOS = ["Medidas", "Placas", "Alarmes", "Alarmes_Supervisores"]
+
+
+def gravar_exportacao(pasta: str, frames, formato: str = "csv") -> list:
+    # grava como o gerenciador exporta: duas linhas de título antes do cabeçalho (header_linha=2)
+    os.makedirs(pasta, exist_ok=True)
+    caminhos = []
+    for nome, df in zip(ARQUIVOS, frames):
+        caminho = os.path.join(pasta, f"{nome}.{formato}")
+        if formato == "csv":
+            with open(caminho, "w", encoding="utf-8", newline="") as f:
+                f.write(f"Relatorio {nome}\nExportacao sintetica\n")
+                df.to_csv(f, sep=";", index=False)
+        elif formato == "xlsx":
+            if len(df) >= 1_048_576 - 3:
+                raise ValueError(f"{nome}: {len(df):,} linhas não cabem numa planilha Excel; use csv")
+            with pd.ExcelWriter(caminho, engine="xlsxwriter") as w:
+                df.to_excel(w, index=False, startrow=2)
+        else:
+            raise ValueError(f"Formato não suportado: {formato}")
+        caminhos.append(caminho)
+    return caminhos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera uma exportação sintética (medidas, placas, alarmes e supervisores).")
+    parser.add_argument("pasta", help="pasta de destino (pode ser usada no analiseLote.py)")
+    parser.add_argument("--linhas", type=int, default=100_000, help="linhas do arquivo de medidas")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-f", "--formato", choices=["csv", "xlsx"], default="csv")
+    args = parser.parse_args(argv)
+
+    frames = gerar_exportacao(args.linhas, args.seed)
+    for caminho, df in zip(gravar_exportacao(args.pasta, frames, args.formato), frames):
+        print(f"{caminho}: {len(df):,} linhas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import hashlib
+import io
+import os
+import threading
+import zipfile
+import pandas as pd
+import xlsxwriter
+from cachetools import LRUCache
+
+# nome da aba/arquivo de cada DataFrame do resultado, na ordem devolvida por motorAnalise.analisar
+ABAS = [
+    ("Análise FEC", "analise_fec"),
+    ("Placas em teste", "placas_em_teste"),
+    ("Equipamentos sem gerência", "sem_gerencia"),
+    ("Alarmes Supervisores", "alarmes_supervisores"),
+]
+
+FORMATOS = {
+    "xlsx": ("Excel (.xlsx)", "analise_equipamentos.xlsx",
+             "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": ("CSV (.zip)", "analise_equipamentos_csv.zip", "application/zip"),
+    "parquet": ("Parquet (.zip)", "analise_equipamentos_parquet.zip", "application/zip"),
+}
+
+# limites do formato .xlsx (o xlsxwriter ignora em silêncio o que passar deles)
+MAX_LINHAS_EXCEL = 1_048_576
+MAX_COLUNAS_EXCEL = 16_384
+
+# linhas convertidas por vez ao escrever o Excel (limita a cópia em memória)
+BLOCO_EXCEL = 10_000
+
+# orçamento (MB) dos relatórios já gerados, compartilhado por todas as sessões
+CACHE_RELATORIOS_MB = int(os.environ.get("CACHE_RELATORIOS_MB", "256"))
+
+# LRU limitado por bytes, como o cache de planilhas
+_relatorios = LRUCache(maxsize=CACHE_RELATORIOS_MB * 1024 * 1024, getsizeof=len)
+_lock = threading.Lock()
+
+
+def _abas(resultados, df_placas_em_teste, df_sem_gerencia, df_analise_supervisores):
+    # a aba de análise FEC sempre é gerada; as demais só se tiverem linhas
+    frames = [resultados, df_placas_em_teste, df_sem_gerencia, df_analise_supervisores]
+    for i, ((aba, arquivo), df) in enumerate(zip(ABAS, frames)):
+        if i == 0 or not df.empty:
+            yield aba, arquivo, df
+
+
+def _escrever_aba(wb, aba: str, df: pd.DataFrame, negrito):
+    # constant_memory exige escrever linha a linha, em ordem (o to_excel escreve por coluna)
+    ws = wb.add_worksheet(aba)
+    ws.write_row(0, 0, [str(c) for c in df.columns], negrito)
+    linha = 1
+    for inicio in range(0, len(df), BLOCO_EXCEL):
+        bloco = df.iloc[inicio:inicio + BLOCO_EXCEL].astype(object)
+        valores = bloco.where(bloco.notna(), None).to_numpy()
+        for registro in valores:
+            ws.write_row(linha, 0, registro)
+            linha += 1
+
+
+def escrever_excel(destino, resultados, df_placas_em_teste, df_sem_gerencia, df_analise_supervisores):
+    # destino: caminho ou buffer (io.BytesIO); o xlsxwriter em modo constant_memory mantém
+    # só a linha atual em memória em vez da planilha inteira
+    for aba, _, df in _abas(resultados, df_placas_em_teste, df_sem_gerencia, df_analise_supervisores):
+        # conferido antes de criar o arquivo: nada é gravado pela metade
+        if len(df) + 1 > MAX_LINHAS_EXCEL or len(df.columns) > MAX_COLUNAS_EXCEL:
+            raise ValueError(
+                f"A aba '{aba}' tem {len(df):,} linhas e {len(df.columns)} colunas, acima do limite do "
+                f"Excel ({MAX_LINHAS_EXCEL - 1:,} linhas de dados). Exporte em CSV ou Parquet."
+            )
+    wb = xlsxwriter.Workbook(destino, {
+        "constant_memory": True,
+        "default_date_format": "yyyy-mm-dd hh:mm:ss",
+        "nan_inf_to_errors": True,
+    })
+    try:
+        negrito = wb.add_format({"bold": True, "border": 1})
+        for aba, _, df in _abas(resultados, df_placas_em_teste, df_sem_gerencia, df_analise_supervisores):
+            _escrever_aba(wb, aba, df, negrito)
+    finally:
+        wb.close()
+    return destino
+
+
+def _para_parquet(df: pd.DataFrame, destino):
+    try:
+        df.to_parquet(destino, index=False)
+    except Exception:
+        # colunas com tipos misturados não são aceitas pelo Arrow: grava como texto
+        if hasattr(destino, "seek"):
+            destino.seek(0)
+            destino.truncate()
+        objetos = df.select_dtypes(include="object").columns
+        df.astype({c: "string" for c in objetos}).to_parquet(destino, index=False)
+
+
+def escrever_zip(destino, formato, resultados, df_placas_em_teste, df_sem_gerencia, df_analise_supervisores):
+    # um arquivo CSV ou Parquet por DataFrame, num único .zip
+    with zipfile.ZipFile(destino, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for _, arquivo, df in _abas(resultados, df_placas_em_teste, df_sem_gerencia, df_analise_supervisores):
+            if formato == "csv":
+                with zf.open(f"{arquivo}.csv", "w") as f, io.TextIOWrapper(f, encoding="utf-8", newline="") as t:
+                    df.to_csv(t, index=False)
+            else:
+                buf = io.BytesIO()
+                _para_parquet(df, buf)
+                zf.writestr(f"{arquivo}.parquet", buf.getvalue())
+    return destino
+
+
+def exportar(destino, formato: str, *frames):
+    if formato == "xlsx":
+        return escrever_excel(destino, *frames)
+    if formato in ("csv", "parquet"):
+        return escrever_zip(destino, formato, *frames)
+    raise ValueError(f"Formato de exportação não suportado: {formato}")
+
+
+def hash_resultados(frames) -> str:
+    h = hashlib.sha256()
+    for df in frames:
+        h.update(repr((list(df.columns), df.shape)).encode())
+        try:
+            h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+        except TypeError:
+            # valores não hasheáveis (listas etc.): usa a representação em texto
+            h.update(df.to_csv(index=False).encode())
+    return h.hexdigest()
+
+
+# o relatório só é gerado quando pedido e fica em cache pelo hash do conteúdo + formato
+def relatorio_em_bytes(frames, formato: str = "xlsx") -> bytes:
+    chave = (hash_resultados(frames), formato)
+    with _lock:
+        dados = _relatorios.get(chave)
+    if dados is None:
+        buffer = io.BytesIO()
+        exportar(buffer, formato, *frames)
+        dados = buffer.getvalue()
+        with _lock:
+            try:
+                _relatorios[chave] = dados
+            except ValueError:
+                # maior que o orçamento inteiro: não guarda
+                pass
+    return dados
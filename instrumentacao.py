@@ -0,0 +1,100 @@
+import contextvars
+import json
+import logging
+import sys
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# cada etapa vira uma linha JSON neste logger (nível INFO)
+LOGGER = logging.getLogger("comparandoxlsx.desempenho")
+
+_atual = contextvars.ContextVar("medicao_atual", default=None)
+
+
+class Cancelada(Exception):
+    # levantada no início de uma etapa quando a medição em curso foi cancelada
+    pass
+
+
+class Medicao:
+    # etapas registradas durante um `medir(...)`: tempo, linhas e pico de memória
+    def __init__(self, nome: str):
+        self.nome = nome
+        self.id = uuid.uuid4().hex[:12]
+        self.etapas = []
+        # marcado de fora (ex.: tarefas.cancelar); a próxima etapa interrompe a execução
+        self.cancelada = False
+
+    def registrar(self, registro: dict):
+        # uma etapa medida de novo (ex.: exportação a cada rerun) substitui a anterior
+        self.etapas = [e for e in self.etapas if e["etapa"] != registro["etapa"]]
+        self.etapas.append(registro)
+
+    def tabela(self) -> pd.DataFrame:
+        return pd.DataFrame(self.etapas, columns=["etapa", "segundos", "linhas", "memoria_pico_mb"])
+
+    def total(self) -> float:
+        return sum(e["segundos"] for e in self.etapas)
+
+
+def memoria_por_etapa() -> bool:
+    # True: o pico registrado é o de cada etapa; False: é o pico de RSS do processo inteiro
+    # (o mesmo para todas as etapas de um processo de longa duração, como o Streamlit)
+    return tracemalloc.is_tracing()
+
+
+def _memoria_pico_mb() -> float | None:
+    # com tracemalloc ligado (PYTHONTRACEMALLOC=1) o pico é da etapa; senão, o pico de RSS do processo
+    if tracemalloc.is_tracing():
+        return round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em bytes no macOS e em KB nos demais
+    return round(pico / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+
+@contextmanager
+def medir(nome: str, medicao: Medicao | None = None):
+    # as etapas executadas dentro do bloco são registradas em `medicao` (nova se não informada)
+    medicao = medicao or Medicao(nome)
+    token = _atual.set(medicao)
+    try:
+        yield medicao
+    finally:
+        _atual.reset(token)
+
+
+@contextmanager
+def etapa(nome: str, linhas: int | None = None):
+    # uso: `with etapa("deteccao", linhas=len(df)) as e: ...`; e["linhas"] pode ser
+    # ajustado dentro do bloco. Fora de um `medir(...)` só gera o log.
+    medicao = _atual.get()
+    if medicao is not None and medicao.cancelada:
+        raise Cancelada(f"{medicao.nome}: cancelada antes da etapa {nome}")
+    registro = {"etapa": nome, "linhas": linhas}
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+    inicio = time.perf_counter()
+    try:
+        yield registro
+    finally:
+        registro["segundos"] = round(time.perf_counter() - inicio, 4)
+        registro["memoria_pico_mb"] = _memoria_pico_mb()
+        if medicao is not None:
+            medicao.registrar(registro)
+        if LOGGER.isEnabledFor(logging.INFO):
+            LOGGER.info(json.dumps({
+                "evento": "etapa",
+                "medicao": medicao.nome if medicao else None,
+                "execucao": medicao.id if medicao else None,
+                **registro,
+            }, ensure_ascii=False))
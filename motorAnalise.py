@@ -0,0 +1,367 @@
+import re
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from normalizacao import (
+    _strip_accents, _norm_colname, normalizar_categorico, normalizar_serie, normalizar_unicos,
+)
+from utils import carregar_arquivo, COLUNAS_ANALISE
+from cacheResultados import cache_padrao, impressao_linhas
+from instrumentacao import etapa
+from regras import Regras, regras_atuais
+
+# padrões de dispositivo, regras por tipo, limiares, alarmes críticos e listas dos supervisores
+# ficam em regras.json (ver regras.py)
+
+COLUNAS_OBRIGATORIAS = ["Nome", "Valor", "Tipo"]
+COLUNAS_AUXILIARES = [
+    "_SER_NORM_",
+    "_DETECTED_DEVICE_",
+    "_DETECTED_RAW_"
+]
+CANDIDATOS_SERIE_1 = [
+    "Numero de Série", "Número de Série", "Numero de Serie", "Nº de Série", "N° de Série",
+    "Numero de Serie:", "Serial", "Serial Number", "Num Serie", "NumeroSerie"
+]
+CANDIDATOS_SERIE_2 = [
+    "Numero de Serie", "Número de Série", "Numero de Série", "Nº de Série", "N° de Série",
+    "NumeroSerie", "Serial", "Serial Number"
+]
+CANDIDATOS_EM_TESTE = ["Em Teste", "Em Teste:", "EmTeste", "Em_Teste"]
+
+
+def _find_col(df: pd.DataFrame, candidates) -> str | None:
+    norm_map = {_norm_colname(c): c for c in df.columns}
+    cand_norm = [_norm_colname(c) for c in candidates]
+    for w in cand_norm:
+        if w in norm_map:
+            return norm_map[w]
+    for w in cand_norm:
+        for k, orig in norm_map.items():
+            if w in k:
+                return orig
+    return None
+
+def _em_teste_is_true(v) -> bool | None:
+    t = _strip_accents(str(v)).strip().upper()
+    if t in {"SIM", "S", "YES", "Y", "TRUE", "1"}:
+        return True
+    if t in {"NAO", "NAO.", "N", "NAO ", "NAO*", "NAO/", "NAO-", "NAO_", "NÃO", "NO", "FALSE", "0"}:
+        return False
+    return None
+
+def indice_placas_em_teste(df2: pd.DataFrame, col_ns_2: str, col_emteste: str) -> set:
+    # seriais normalizados com ao menos uma placa marcada "Em Teste" (construído uma vez por df2)
+    em_teste = df2[col_emteste].fillna("").astype(str)
+    mapa = {v: _em_teste_is_true(v) is True for v in em_teste.unique()}
+    seriais = normalizar_serie(df2.loc[em_teste.map(mapa).to_numpy(dtype=bool), col_ns_2])
+    return set(seriais[seriais != ""])
+
+@lru_cache(maxsize=8)
+def _compilar_detector(device_patterns: tuple):
+    # uma única regex com todas as alternativas dentro de um lookahead, testada em cada posição;
+    # em uma posição vence a primeira alternativa da lista, e entre posições a de maior prioridade
+    alternativas, prioridade_grupo, grupo = [], {}, 1
+    for prioridade, (_, pat) in enumerate(device_patterns):
+        alternativas.append(f"({pat})")
+        prioridade_grupo[grupo] = prioridade
+        grupo += 1 + re.compile(pat).groups
+    return re.compile("(?=" + "|".join(alternativas) + ")"), prioridade_grupo
+
+def _detectar(nome: str, detector, prioridade_grupo: dict):
+    melhor, bruto = None, None
+    for m in detector.finditer(nome.upper()):
+        prioridade = prioridade_grupo[m.lastindex]
+        if melhor is None or prioridade < melhor:
+            melhor, bruto = prioridade, m.group(m.lastindex)
+            if melhor == 0:
+                break
+    return melhor, bruto
+
+def identificar_dispositivos(nomes: pd.Series, device_patterns) -> tuple[pd.Series, pd.Series]:
+    # mesma prioridade de antes (primeiro padrão da lista que aparece no nome), mas com uma
+    # passada por nome distinto; os resultados são espalhados de volta pelos códigos do factorize
+    # e devolvidos como categóricos (código por linha em vez de um objeto str)
+    detector, prioridade_grupo = _compilar_detector(tuple(map(tuple, device_patterns)))
+    codigos, unicos = pd.factorize(nomes)
+    # posição extra no fim: nome vazio (código -1) fica sem dispositivo
+    prioridades = np.full(len(unicos) + 1, -1, dtype=np.int64)
+    brutos = np.full(len(unicos) + 1, None, dtype=object)
+    for i, nome in enumerate(unicos):
+        prioridade, bruto = _detectar(str(nome), detector, prioridade_grupo)
+        if prioridade is not None:
+            prioridades[i] = prioridade
+            brutos[i] = bruto
+    codigos_brutos, categorias_brutos = pd.factorize(brutos)
+    return (
+        pd.Series(pd.Categorical.from_codes(
+            prioridades[codigos], [d for d, _ in device_patterns]
+        ), index=nomes.index),
+        pd.Series(pd.Categorical.from_codes(codigos_brutos[codigos], categorias_brutos), index=nomes.index),
+    )
+
+_RE_NUMERO_PLACA = re.compile(r"#\s*(\d+)")
+
+def _chaves_placa(placa: str, dispositivos: list) -> set:
+    # reproduz a busca "dispositivo.*#\s*numero" (sem distinção de maiúsculas): o dispositivo
+    # aparece antes do "#" na mesma linha e o número da medida casa como prefixo dos dígitos
+    placa = placa.upper()
+    chaves = {(d, None) for d in dispositivos if d in placa}
+    if not chaves:
+        return chaves
+    for m in _RE_NUMERO_PLACA.finditer(placa):
+        antes = placa[placa.rfind("\n", 0, m.start()) + 1:m.start()]
+        digitos = m.group(1)
+        for dispositivo in dispositivos:
+            if dispositivo in antes:
+                chaves.update((dispositivo, digitos[:k]) for k in range(1, len(digitos) + 1))
+    return chaves
+
+def indice_alarmes(df_alarm: pd.DataFrame, col_placa: str, col_alarme: str,
+                   dispositivos: list, alarmes_criticos: list) -> dict:
+    # (dispositivo, número da placa ou None) -> alarmes críticos encontrados para essa placa
+    placas = df_alarm[col_placa].astype(str)
+    alarmes = df_alarm[col_alarme].fillna("").astype(str).str.upper()
+
+    criticos_por_placa = {}
+    for alarme in alarmes_criticos:
+        for placa in placas[alarmes.str.contains(alarme, regex=False)].unique():
+            criticos_por_placa.setdefault(placa, set()).add(alarme)
+
+    indice = {}
+    for placa, criticos in criticos_por_placa.items():
+        for chave in _chaves_placa(placa, dispositivos):
+            indice.setdefault(chave, set()).update(criticos)
+    return indice
+
+def classificar_fec(df1: pd.DataFrame, regras: Regras):
+    # cada linha vira uma consulta, pelos códigos categóricos, nas tabelas tipo x dispositivo
+    # compiladas pelas regras (avaliadas uma vez por texto de tipo distinto no processo)
+    dispositivos = pd.Categorical(df1["_DETECTED_DEVICE_"])
+    tipos = pd.Categorical(df1["Tipo"])
+    # categorias que só diferem por maiúsculas viram textos repetidos, o que não muda o resultado
+    aceitos, limiar_tipo = regras.tabelas_tipo(pd.Index(tipos.categories.astype(str)).str.lower())
+
+    # código -1 (sem tipo / sem dispositivo) cai na última linha / coluna, sempre False / NaN
+    coluna = np.append(regras.codigos_dispositivo(dispositivos.categories), -1)[dispositivos.codes]
+    valor = pd.to_numeric(df1["Valor"], errors="coerce").to_numpy(dtype=float)
+    elegiveis = aceitos[tipos.codes, coluna] & ~np.isnan(valor)
+    limiar = limiar_tipo[tipos.codes]
+    com_limiar = elegiveis & ~np.isnan(limiar)
+
+    # rótulo categórico: "" | "Recomendado para <disp>" | "Acima do recomendado para <disp>"
+    nomes = dispositivos.categories.astype(str)
+    rotulos = [""] + [f"Recomendado para {d}" for d in nomes] + [f"Acima do recomendado para {d}" for d in nomes]
+    acima = ~(valor < limiar)
+    codigos = np.where(com_limiar, 1 + dispositivos.codes + acima * len(nomes), 0)
+    analise = pd.Series(pd.Categorical.from_codes(codigos, rotulos), index=df1.index)
+    return analise, elegiveis
+
+def _contem(unicos: tuple, padrao: re.Pattern) -> np.ndarray:
+    # busca da regex nos valores distintos normalizados, espalhada de volta para as linhas
+    codigos, normalizados = unicos
+    return normalizados.str.contains(padrao).to_numpy(dtype=bool)[codigos]
+
+def analisar_supervisores(df4: pd.DataFrame, regras: Regras | None = None) -> pd.DataFrame:
+    regras = regras or regras_atuais()
+    col_placa_df4 = _find_col(df4, ["Placa", "Placa:"])
+    col_alarme_df4 = _find_col(df4, ["Alarme", "Alarme:"])
+    col_ne_df4 = _find_col(df4, ["NE", "NE:"])
+
+    def coluna(col):
+        return df4[col] if col is not None else pd.Series("", index=df4.index)
+
+    placa_orig = coluna(col_placa_df4).astype(str)   # mantém formato original
+    ne_orig = coluna(col_ne_df4)                     # mantém formato original
+    alarme = coluna(col_alarme_df4).astype(str)      # normalizado só para comparação
+
+    alarme_unicos = normalizar_unicos(alarme)
+    alvo = _contem(normalizar_unicos(placa_orig), regras.re_placas_supervisor)
+    site = alvo & _contem(alarme_unicos, regras.re_site_sem_gerencia)
+    dcn = alvo & ~site & _contem(alarme_unicos, regras.re_dcn)
+
+    selecionadas = site | dcn
+    if not selecionadas.any():
+        return pd.DataFrame()
+    return pd.DataFrame({
+        "NE": ne_orig[selecionadas].to_numpy(),
+        "Placa:": placa_orig[selecionadas].to_numpy(),
+        "Análise": np.where(
+            site[selecionadas],
+            "Site sem gerenciamento, necessário verificar supervisor.",
+            "Falha de Comunicacao, necessário verificar a conexão da placa com a rede DCN",
+        ),
+    })
+
+def _detectar_e_classificar(df1: pd.DataFrame, regras: Regras) -> pd.DataFrame:
+    # parte da análise que depende só da própria linha (Nome, Tipo e Valor já normalizados)
+    dispositivo, bruto = identificar_dispositivos(df1["Nome"], regras.padroes)
+    analise, elegiveis = classificar_fec(
+        df1[["Tipo", "Valor"]].assign(_DETECTED_DEVICE_=dispositivo), regras
+    )
+    return pd.DataFrame({
+        "_DETECTED_DEVICE_": dispositivo,
+        "_DETECTED_RAW_": bruto,
+        "Análise de FEC": analise,
+        "elegivel": elegiveis,
+    }, index=df1.index)
+
+def _para_numero(valor: pd.Series) -> pd.Series:
+    # "Valor" com vírgula ou ponto decimal; o que não for número vira NaN
+    if pd.api.types.is_numeric_dtype(valor) and not pd.api.types.is_bool_dtype(valor):
+        return valor
+    if isinstance(valor.dtype, pd.StringDtype):
+        texto = valor.str.replace(",", ".", regex=False)
+        try:
+            # conversão direta no Arrow; se algum texto não for número, usa o to_numeric
+            return texto.astype("float64[pyarrow]").astype(float)
+        except (pa.ArrowInvalid, ValueError):
+            return pd.to_numeric(texto, errors="coerce").astype(float)
+    return pd.to_numeric(valor.astype(str).str.replace(",", ".", regex=False), errors="coerce")
+
+def _minusculas(s: pd.Series) -> pd.Series:
+    # texto em minúsculas como categórico, convertendo só os valores distintos
+    codigos, unicos = pd.factorize(s)
+    mapa, categorias = pd.factorize(pd.Index(pd.Series(unicos, dtype=object).astype(str)).str.lower())
+    return pd.Series(pd.Categorical.from_codes(np.append(mapa, -1)[codigos], categorias), index=s.index)
+
+def _limpar(df: pd.DataFrame, vazias: bool = True) -> pd.DataFrame:
+    # remove colunas auxiliares (ignorando as que não existirem) e colunas vazias
+    df = df.drop(columns=COLUNAS_AUXILIARES, errors='ignore')
+    df = df.dropna(axis=1, how='all')
+    if vazias:
+        df = df.loc[:, (df != '').any(axis=0)]
+    return df
+
+# etapas medidas em `analisar`, na ordem (usadas para mostrar o progresso)
+ETAPAS = (
+    "normalizacao", "deteccao_classificacao", "placas_em_teste", "alarmes", "supervisores", "montagem_resultados",
+)
+
+# executa a análise completa; df3 (alarmes) e df4 (supervisores) são opcionais.
+# Retorna (resultados, placas em teste, equipamentos sem gerência, alarmes supervisores)
+# `cache_linhas` (cacheResultados.CacheLinhas) reaproveita a classificação das linhas já vistas;
+# "padrao" usa o cache configurado por CACHE_RESULTADOS_DB e None desativa;
+# `regras` (regras.Regras) padrão: as do arquivo regras.json / REGRAS_ARQUIVO
+def analisar(df1: pd.DataFrame, df2: pd.DataFrame, df3: pd.DataFrame | None = None,
+             df4: pd.DataFrame | None = None, cache_linhas="padrao", regras: Regras | None = None):
+    regras = regras or regras_atuais()
+    if not all(c in df1.columns for c in COLUNAS_OBRIGATORIAS):
+        raise ValueError("As colunas 'Nome', 'Valor' e/ou 'Tipo' não foram encontradas no primeiro arquivo.")
+
+    col_ns_1 = _find_col(df1, CANDIDATOS_SERIE_1)
+    col_ns_2 = _find_col(df2, CANDIDATOS_SERIE_2)
+    col_emteste = _find_col(df2, CANDIDATOS_EM_TESTE)
+
+    df_alarm = df3 if df3 is not None else df2
+    col_placa_a = _find_col(df_alarm, ["Placa", "Placa:"])
+    col_alarme = _find_col(df_alarm, ["Alarme", "Alarme:"])
+
+    # normalizações iniciais; a cópia rasa compartilha as colunas com a entrada, que não é
+    # alterada: as colunas derivadas são sempre atribuídas inteiras
+    with etapa("normalizacao", linhas=len(df1)):
+        df1 = df1.copy(deep=False)
+        # os resultados não são mais o conteúdo do arquivo lido
+        df1.attrs.pop("chave_arquivo", None)
+        df1["Valor"] = _para_numero(df1["Valor"])
+        df1["Tipo"] = _minusculas(df1["Tipo"])
+
+    # detecção + classificação; com cache, só para as linhas novas ou alteradas
+    with etapa("deteccao_classificacao", linhas=len(df1)):
+        if cache_linhas == "padrao":
+            cache_linhas = cache_padrao(regras.versao)
+        if cache_linhas is None:
+            linhas = _detectar_e_classificar(df1, regras)
+        else:
+            colunas_linha = ["Nome", "Tipo", "Valor"] + ([col_ns_1] if col_ns_1 else [])
+            linhas = cache_linhas.classificar(
+                df1, impressao_linhas(df1, colunas_linha), lambda df: _detectar_e_classificar(df, regras)
+            )
+
+        # rótulos categóricos (o cache devolve texto); "Placa em teste" é atribuído mais abaixo
+        analise = linhas["Análise de FEC"].astype("category")
+        if "Placa em teste" not in analise.cat.categories:
+            analise = analise.cat.add_categories("Placa em teste")
+        df1["Análise de FEC"] = analise
+
+        # cria colunas auxiliares com o device detectado
+        df1["_DETECTED_DEVICE_"] = linhas["_DETECTED_DEVICE_"].astype("category")
+        df1["_DETECTED_RAW_"] = linhas["_DETECTED_RAW_"].astype("category")
+
+        # criar coluna de serial normalizado (se aplicável)
+        if col_ns_1:
+            df1["_SER_NORM_"] = normalizar_categorico(df1[col_ns_1])
+        else:
+            df1["_SER_NORM_"] = ""
+
+        elegiveis = linhas["elegivel"].to_numpy(dtype=bool)
+
+    zeros = elegiveis & (df1["Valor"] == 0).to_numpy()
+
+    # placas em teste: consulta única no índice serial normalizado -> "alguma placa em teste"
+    with etapa("placas_em_teste", linhas=len(df2)):
+        em_teste = np.zeros(len(df1), dtype=bool)
+        if col_ns_2 and col_emteste and col_ns_1:
+            seriais_em_teste = indice_placas_em_teste(df2, col_ns_2, col_emteste)
+            em_teste = zeros & df1["_SER_NORM_"].isin(seriais_em_teste).to_numpy()
+            df1.loc[em_teste, "Análise de FEC"] = "Placa em teste"
+        df_placas_em_teste = df1[em_teste]
+
+    # demais linhas com valor == 0 procuram alarmes críticos no df_alarm (df3 se disponível ou df2)
+    pendentes = zeros & ~em_teste
+    with etapa("alarmes", linhas=int(pendentes.sum())):
+        sem_gerencia = np.zeros(len(df1), dtype=bool)
+        alarmes_encontrados = []
+        if col_placa_a and col_alarme and pendentes.any():
+            indice = indice_alarmes(
+                df_alarm, col_placa_a, col_alarme,
+                regras.dispositivos, regras.alarmes_criticos
+            )
+            # extrai número após "#" se houver
+            numeros = df1.loc[pendentes, "Nome"].astype(str).str.extract(r"#\s*(\d+)", expand=False)
+            for pos, dispositivo, numero in zip(
+                np.flatnonzero(pendentes), df1.loc[pendentes, "_DETECTED_DEVICE_"], numeros
+            ):
+                criticos = indice.get((dispositivo, numero if isinstance(numero, str) else None))
+                if criticos:
+                    sem_gerencia[pos] = True
+                    alarmes_encontrados.append(next(a for a in regras.alarmes_criticos if a in criticos))
+
+        # equipamento sem gerência não recebe análise de limiar
+        df1.loc[sem_gerencia, "Análise de FEC"] = ""
+        df_sem_gerencia = df1[sem_gerencia].assign(**{"Alarme encontrado": alarmes_encontrados})
+
+    # analise para supervisores (arquivo df4)
+    with etapa("supervisores", linhas=len(df4) if df4 is not None else 0):
+        df_analise_supervisores = analisar_supervisores(df4, regras) if df4 is not None else pd.DataFrame()
+
+    with etapa("montagem_resultados") as e:
+        # remove de uma vez as placas em teste
+        df1 = df1[~em_teste]
+
+        # montagem dos resultados finais
+        resultados = df1[df1["Análise de FEC"].notna() & (df1["Análise de FEC"] != "")]
+        finais = (
+            _limpar(resultados),
+            _limpar(df_placas_em_teste, vazias=False),
+            _limpar(df_sem_gerencia),
+            df_analise_supervisores,
+        )
+        e["linhas"] = len(finais[0])
+    return finais
+
+# mesma análise a partir de caminhos (ou arquivos abertos); 3 e 4 são ignorados se falharem
+def analisar_arquivos(arquivo1, arquivo2, arquivo3=None, arquivo4=None, header_linha: int = 2,
+                      cache_linhas="padrao", regras: Regras | None = None):
+    with etapa("carga") as e:
+        df1 = carregar_arquivo(arquivo1, header_linha=header_linha)
+        df2 = carregar_arquivo(arquivo2, header_linha=header_linha, colunas=COLUNAS_ANALISE)
+        opcionais = []
+        for arquivo, colunas in ((arquivo3, COLUNAS_ANALISE), (arquivo4, None)):
+            try:
+                opcionais.append(carregar_arquivo(arquivo, header_linha=header_linha, colunas=colunas))
+            except Exception:
+                opcionais.append(None)
+        e["linhas"] = sum(len(df) for df in (df1, df2, *opcionais) if df is not None)
+    return analisar(df1, df2, *opcionais, cache_linhas=cache_linhas, regras=regras)
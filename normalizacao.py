@@ -0,0 +1,71 @@
+import re
+import unicodedata
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+# regexes compiladas uma vez (antes eram passadas como texto para re.sub a cada célula)
+_RE_ESPACOS = re.compile(r"\s+")
+_RE_NAO_ALNUM = re.compile(r"[^A-Z0-9()]")
+
+# os mesmos textos (seriais, placas, constantes das regras) se repetem muito: cache LRU
+TAMANHO_CACHE = 1 << 16
+
+
+@lru_cache(maxsize=TAMANHO_CACHE)
+def _strip_accents(s: str) -> str:
+    try:
+        return unicodedata.normalize("NFKD", s).encode("ASCII", "ignore").decode("ASCII")
+    except Exception:
+        return s
+
+@lru_cache(maxsize=TAMANHO_CACHE)
+def _norm_texto_str(s: str) -> str:
+    s = _strip_accents(s).upper()
+    s = _RE_ESPACOS.sub("", s)
+    s = _RE_NAO_ALNUM.sub("", s)
+    return s
+
+def _norm_text(s: str) -> str:
+    if s is None or (isinstance(s, float) and pd.isna(s)):
+        return ""
+    return _norm_texto_str(str(s))
+
+@lru_cache(maxsize=TAMANHO_CACHE)
+def _norm_colname_str(cname: str) -> str:
+    cname = _strip_accents(cname).lower().strip()
+    cname = cname.replace(":", "")
+    cname = _RE_ESPACOS.sub(" ", cname)
+    return cname
+
+def _norm_colname(cname: str) -> str:
+    return _norm_colname_str(str(cname))
+
+
+def normalizar_unicos(s: pd.Series) -> tuple[np.ndarray, pd.Series]:
+    # _norm_text aplicado só aos valores distintos de uma coluna de str;
+    # retorna os códigos de cada linha e os valores distintos já normalizados
+    codigos, unicos = pd.factorize(s)
+    normalizados = (
+        pd.Series(unicos, dtype=object)
+        .str.normalize("NFKD").str.encode("ascii", "ignore").str.decode("ascii")
+        .str.upper()
+        .str.replace(_RE_NAO_ALNUM, "", regex=True)
+    )
+    return codigos, normalizados
+
+def normalizar_serie(s: pd.Series) -> pd.Series:
+    # equivalente a s.apply(_norm_text), mas normalizando cada valor distinto uma vez só
+    vazios = s.isna().to_numpy()
+    codigos, normalizados = normalizar_unicos(s.astype(str))
+    resultado = normalizados.to_numpy()[codigos]
+    resultado[vazios] = ""
+    return pd.Series(resultado, index=s.index, dtype=object)
+
+def normalizar_categorico(s: pd.Series) -> pd.Series:
+    # mesmo resultado de normalizar_serie, mas categórico: só os valores distintos viram texto
+    # (vazios = "", que fica na primeira categoria)
+    codigos, unicos = pd.factorize(s)
+    _, normalizados = normalizar_unicos(pd.Series(unicos, dtype=object).astype(str))
+    mapa, categorias = pd.factorize(pd.concat([pd.Series([""]), normalizados], ignore_index=True))
+    return pd.Series(pd.Categorical.from_codes(mapa[codigos + 1], categorias), index=s.index)
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import numpy as np
+
+from normalizacao import _norm_text
+
+# Regras da análise (padrões de dispositivo, tipos de medida aceitos por dispositivo, classes de
+# limiar, alarmes críticos e listas dos supervisores) lidas de um JSON versionado. O arquivo é
+# compilado uma vez por processo e recarregado só quando muda no disco.
+ARQUIVO_REGRAS = os.environ.get(
+    "REGRAS_ARQUIVO", os.path.join(os.path.dirname(os.path.abspath(__file__)), "regras.json")
+)
+# formato do arquivo (campo "versao") que este código sabe ler
+VERSAO_FORMATO = 1
+# regex que nunca combina (lista vazia = nada é sinalizado)
+_NUNCA = re.compile(r"(?!)")
+
+
+def _alternativas_tipo(regra, onde: str) -> tuple:
+    # lista de palavras (todas obrigatórias) ou lista de listas (basta uma combinar);
+    # vira sempre uma tupla de alternativas, cada uma uma tupla de palavras em minúsculas
+    if not isinstance(regra, list) or not all(isinstance(p, (str, list)) for p in regra):
+        raise ValueError(f"{onde}: esperada uma lista de palavras ou uma lista de listas")
+    if not regra:
+        return ()
+    if isinstance(regra[0], list):
+        return tuple(tuple(p.lower() for p in sub) for sub in regra)
+    return (tuple(p.lower() for p in regra),)
+
+
+def _combina(texto: str, alternativas: tuple) -> bool:
+    return any(all(p in texto for p in palavras) for palavras in alternativas)
+
+
+def _alternativas(textos) -> re.Pattern:
+    # textos normalizados uma única vez e reunidos em uma regex só
+    if not textos:
+        return _NUNCA
+    return re.compile("|".join(re.escape(_norm_text(t)) for t in textos))
+
+
+class Regras:
+    def __init__(self, config: dict, origem: str = "<config>"):
+        try:
+            if config.get("versao") != VERSAO_FORMATO:
+                raise ValueError(
+                    f"{origem}: versão do formato {config.get('versao')!r} não suportada (esperada {VERSAO_FORMATO})"
+                )
+            self.padroes = tuple((d["nome"], d["padrao"]) for d in config["dispositivos"])
+            regras_tipo = config["regras_tipo"]
+            # classes de limiar na ordem do arquivo: vale a primeira que combinar com o tipo
+            self.limiares = tuple(
+                (c["classe"], float(c["limiar"]), _alternativas_tipo(c["tipos"], f"{origem}: limiares[{c['classe']}]"))
+                for c in config["limiares"]
+            )
+            self.alarmes_criticos = tuple(config["alarmes_criticos"])
+            supervisores = config["supervisores"]
+            self.placas_supervisor = tuple(supervisores["placas"])
+            self.alarmes_site_sem_gerencia = tuple(supervisores["alarmes_site_sem_gerencia"])
+            self.alarmes_dcn = tuple(supervisores["alarmes_dcn"])
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"{origem}: configuração de regras incompleta ({e})") from e
+        if not self.padroes:
+            raise ValueError(f"{origem}: a lista de dispositivos está vazia")
+
+        for nome, padrao in self.padroes:
+            try:
+                re.compile(padrao)
+            except re.error as e:
+                raise ValueError(f"{origem}: padrão inválido para o dispositivo {nome}: {e}") from e
+
+        # muda sempre que qualquer regra muda (invalida o cache por linha)
+        conteudo = json.dumps(config, sort_keys=True, ensure_ascii=False)
+        self.versao = hashlib.sha256(conteudo.encode()).hexdigest()[:16]
+
+        self.dispositivos = tuple(nome for nome, _ in self.padroes)
+        self.indice_dispositivo = {nome: i for i, nome in enumerate(self.dispositivos)}
+        self.regras_tipo = {
+            nome: _alternativas_tipo(regra, f"{origem}: regras_tipo[{nome}]") for nome, regra in regras_tipo.items()
+        }
+
+        self.re_placas_supervisor = _alternativas(self.placas_supervisor)
+        self.re_site_sem_gerencia = _alternativas(self.alarmes_site_sem_gerencia)
+        self.re_dcn = _alternativas(self.alarmes_dcn)
+
+        # texto do tipo (minúsculas) -> (dispositivos que aceitam o tipo, limiar), preenchido sob demanda
+        self._tipos = {}
+        self._lock = threading.Lock()
+
+    def _tipo(self, texto: str) -> tuple:
+        linha = self._tipos.get(texto)
+        if linha is None:
+            # posição extra no fim: linhas sem dispositivo detectado nunca são elegíveis
+            aceitos = np.zeros(len(self.dispositivos) + 1, dtype=bool)
+            for i, nome in enumerate(self.dispositivos):
+                aceitos[i] = _combina(texto, self.regras_tipo.get(nome, ()))
+            limiar = next((v for _, v, alternativas in self.limiares if _combina(texto, alternativas)), np.nan)
+            linha = (aceitos, limiar)
+            with self._lock:
+                self._tipos[texto] = linha
+        return linha
+
+    def tabelas_tipo(self, tipos) -> tuple[np.ndarray, np.ndarray]:
+        # para os tipos informados (em minúsculas): matriz tipo x dispositivo com o que é aceito e
+        # o limiar de cada tipo; a última linha (tipo vazio) e a última coluna ficam False / NaN
+        linhas = [self._tipo(t) for t in tipos]
+        vazio = np.zeros(len(self.dispositivos) + 1, dtype=bool)
+        aceitos = np.vstack([a for a, _ in linhas] + [vazio])
+        limiares = np.array([v for _, v in linhas] + [np.nan], dtype=float)
+        return aceitos, limiares
+
+    def codigos_dispositivo(self, nomes) -> np.ndarray:
+        # posição de cada nome na lista de dispositivos (-1 = desconhecido, vai para a última coluna)
+        return np.array([self.indice_dispositivo.get(n, -1) for n in nomes], dtype=np.int64)
+
+
+def carregar_regras(caminho: str) -> Regras:
+    with open(caminho, encoding="utf-8") as f:
+        try:
+            config = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{caminho}: JSON inválido ({e})") from e
+    return Regras(config, origem=caminho)
+
+
+_carregadas = {}
+_lock = threading.Lock()
+
+
+def regras_atuais(caminho: str | None = None) -> Regras:
+    # regras compiladas do arquivo (padrão: REGRAS_ARQUIVO), recarregadas quando ele é alterado
+    caminho = caminho or ARQUIVO_REGRAS
+    modificado = os.stat(caminho).st_mtime_ns
+    with _lock:
+        atual = _carregadas.get(caminho)
+        if atual is None or atual[0] != modificado:
+            atual = _carregadas[caminho] = (modificado, carregar_regras(caminho))
+        return atual[1]
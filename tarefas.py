@@ -0,0 +1,131 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentacao import Medicao, medir
+
+# Execução das análises fora da thread do script do Streamlit: a tarefa continua rodando
+# entre reruns e o resultado é buscado depois pelo id guardado em st.session_state.
+# O pool é do processo, compartilhado por todas as sessões, e atende em ordem de chegada.
+
+# análises executadas ao mesmo tempo (as demais esperam na fila)
+MAX_TAREFAS = int(os.environ.get("TAREFAS_MAX", str(max(1, min(4, (os.cpu_count() or 2) // 2)))))
+# por quanto tempo (s) uma tarefa terminada e não buscada fica guardada
+RETENCAO_S = int(os.environ.get("TAREFAS_RETENCAO_S", "3600"))
+
+_tarefas = {}
+_lock = threading.Lock()
+_pool = None
+
+
+class Tarefa:
+    def __init__(self, nome: str, etapas=()):
+        self.id = uuid.uuid4().hex
+        self.nome = nome
+        self.etapas = tuple(etapas)
+        self.medicao = Medicao(nome)
+        self.criada = time.time()
+        self.inicio = None
+        self.fim = None
+        self.cancelada = False
+        self.futuro = None
+
+    @property
+    def estado(self) -> str:
+        if self.cancelada or self.futuro.cancelled():
+            return "cancelada"
+        if not self.futuro.done():
+            return "executando" if self.inicio is not None else "na fila"
+        return "erro" if self.futuro.exception() is not None else "concluida"
+
+    def progresso(self) -> float:
+        # fração das etapas previstas já concluídas (medidas pela instrumentação)
+        if self.futuro.done():
+            return 1.0
+        if not self.etapas:
+            return 0.0
+        feitas = {e["etapa"] for e in self.medicao.etapas}
+        return sum(e in feitas for e in self.etapas) / len(self.etapas)
+
+    def etapa_atual(self) -> str | None:
+        feitas = {e["etapa"] for e in self.medicao.etapas}
+        return next((e for e in self.etapas if e not in feitas), None)
+
+    def resultado(self):
+        # levanta a exceção da análise, se houve
+        return self.futuro.result()
+
+
+def _executar(tarefa: Tarefa, fn, args, kwargs):
+    tarefa.inicio = time.time()
+    try:
+        with medir(tarefa.nome, tarefa.medicao):
+            return fn(*args, **kwargs)
+    finally:
+        tarefa.fim = time.time()
+
+
+def _pool_tarefas() -> ThreadPoolExecutor:
+    # threads: as planilhas já estão em memória e não precisam ser copiadas para outro processo
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=MAX_TAREFAS, thread_name_prefix="analise")
+        return _pool
+
+
+def _descartar_antigas():
+    agora = time.time()
+    with _lock:
+        for id_, tarefa in list(_tarefas.items()):
+            if tarefa.fim is not None and agora - tarefa.fim > RETENCAO_S:
+                del _tarefas[id_]
+
+
+def enviar(fn, *args, nome: str = "analise", etapas=(), **kwargs) -> str:
+    # coloca fn(*args, **kwargs) na fila e devolve o id da tarefa
+    _descartar_antigas()
+    tarefa = Tarefa(nome, etapas)
+    pool = _pool_tarefas()
+    with _lock:
+        _tarefas[tarefa.id] = tarefa
+        tarefa.futuro = pool.submit(_executar, tarefa, fn, args, kwargs)
+    return tarefa.id
+
+
+def obter(id_: str | None) -> Tarefa | None:
+    if id_ is None:
+        return None
+    with _lock:
+        return _tarefas.get(id_)
+
+
+def posicao_na_fila(id_: str) -> int:
+    # 1 = próxima a executar; 0 se já começou ou não existe
+    with _lock:
+        tarefa = _tarefas.get(id_)
+        if tarefa is None or tarefa.inicio is not None or tarefa.futuro.done():
+            return 0
+        return sum(
+            1 for t in _tarefas.values()
+            if t.inicio is None and not t.futuro.done() and t.criada <= tarefa.criada
+        )
+
+
+def cancelar(id_: str | None):
+    # a tarefa ainda na fila sai dela; a que já está executando para no início da próxima
+    # etapa (instrumentacao.Cancelada) e libera o worker
+    tarefa = obter(id_)
+    if tarefa is not None:
+        tarefa.cancelada = True
+        tarefa.medicao.cancelada = True
+        tarefa.futuro.cancel()
+        descartar(id_)
+
+
+def descartar(id_: str | None):
+    # esquece a tarefa (chamado depois que o resultado foi buscado)
+    with _lock:
+        _tarefas.pop(id_, None)
@@ -0,0 +1,13 @@
+import pytest
+
+from analiseLote import nomes_relatorios
+
+
+def test_nomes_relatorios():
+    assert nomes_relatorios(["lote/site0", "lote/site1"]) == ["site0", "site1"]
+    # mesma data em sites diferentes (--subpastas) não grava no mesmo arquivo
+    assert nomes_relatorios(["siteA/2026-10-01", "siteB/2026-10-01", "siteB/2026-10-02"]) == [
+        "siteA_2026-10-01", "siteB_2026-10-01", "siteB_2026-10-02",
+    ]
+    with pytest.raises(ValueError):
+        nomes_relatorios(["siteA", "./siteA"])
@@ -0,0 +1,57 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+import pytest
+
+import cacheArquivos
+from utils import TEXTO
+
+
+def test_cache_em_disco_mantem_tipos(tmp_path, monkeypatch):
+    monkeypatch.setattr(cacheArquivos, "CACHE_DIR", str(tmp_path))
+    df = pd.DataFrame({"Nome": pd.array(["TM400 #1", None], dtype=TEXTO), "Linha": [1, 2]})
+    cacheArquivos._gravar_disco("k", df)
+    pd.testing.assert_frame_equal(cacheArquivos._ler_disco("k"), df)
+
+
+def test_cache_em_disco_colunas_mistas(tmp_path, monkeypatch):
+    # "Valor" lido do Excel mistura números e texto com vírgula
+    monkeypatch.setattr(cacheArquivos, "CACHE_DIR", str(tmp_path))
+    valores = [1, 1.5, "0,3", None, float("nan"), True]
+    df = pd.DataFrame({"Valor": pd.Series(valores, dtype=object), "Inteiros": [1, 2, 3, 4, 5, 6]})
+    cacheArquivos._gravar_disco("k", df)
+    lido = cacheArquivos._ler_disco("k")
+    pd.testing.assert_frame_equal(lido, df)
+    assert [type(v) for v in lido["Valor"]] == [type(v) for v in valores]
+
+
+class _PoolQuebrado:
+    # como um ProcessPoolExecutor depois que um processo filho morreu
+    def __init__(self, no_envio):
+        self.no_envio = no_envio
+
+    def submit(self, *args):
+        if self.no_envio:
+            raise BrokenProcessPool("processo filho morreu")
+        fut = Future()
+        fut.set_exception(BrokenProcessPool("processo filho morreu"))
+        return fut
+
+    def shutdown(self, **kw):
+        pass
+
+
+@pytest.mark.parametrize("no_envio", [True, False])
+def test_pool_de_processos_quebrado(tmp_path, monkeypatch, no_envio):
+    # o arquivo é lido numa thread e o pool é recriado na próxima leitura
+    monkeypatch.setattr(cacheArquivos, "LIMIAR_PROCESSO_BYTES", 0)
+    monkeypatch.setattr(cacheArquivos, "MAX_PROCESSOS", 2)
+    quebrado = _PoolQuebrado(no_envio)
+    monkeypatch.setattr(cacheArquivos, "_processos", quebrado)
+    caminho = tmp_path / "placas.csv"
+    caminho.write_text("titulo\n\nNumero de Serie;Em Teste\nSN1;Sim\n")
+    lido = cacheArquivos.ler_planilhas({"placas": str(caminho)}, header_linha=2)["placas"]
+    assert lido["Numero de Serie"].tolist() == ["SN1"]
+    assert cacheArquivos._processos is None
+    cacheArquivos.limpar_cache()
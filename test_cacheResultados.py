@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+import cacheResultados
+from cacheResultados import CacheLinhas
+from dadosSinteticos import gerar_exportacao
+from motorAnalise import analisar
+
+
+def _calcular(df: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame({
+        "_DETECTED_DEVICE_": "TM400", "_DETECTED_RAW_": "TM400", "Análise de FEC": "", "elegivel": False,
+    }, index=df.index)
+
+
+def _classificar(cache: CacheLinhas, impressoes: list):
+    cache.classificar(pd.DataFrame(index=range(len(impressoes))), np.array(impressoes, dtype=np.int64), _calcular)
+
+
+def _guardadas(cache: CacheLinhas) -> list:
+    with cache._conectar() as con:
+        return sorted(i for (i,) in con.execute("SELECT impressao FROM linhas"))
+
+
+def test_descarta_as_usadas_ha_mais_tempo(tmp_path, monkeypatch):
+    # a ordem de descarte é a de uso, não o valor da impressão
+    monkeypatch.setattr(cacheResultados, "LIMITE_LINHAS", 5)
+    cache = CacheLinhas(str(tmp_path / "linhas.sqlite"), "teste")
+    _classificar(cache, [100, 200, 300, 400, 500])
+    _classificar(cache, [-5, 7])
+    assert _guardadas(cache) == [-5, 7, 300, 400, 500]
+
+    # encontrar a linha no cache também conta como uso
+    _classificar(cache, [300])
+    _classificar(cache, [8, 9])
+    assert _guardadas(cache) == [-5, 7, 8, 9, 300]
+
+
+def test_mesmo_resultado_com_e_sem_cache(tmp_path):
+    # a segunda execução sai toda do cache e a terceira mistura linhas em cache e novas
+    dados = gerar_exportacao(4000, seed=7)
+    medidas = dados[0].copy()
+    medidas.loc[medidas.index[:500], "Valor"] = "0"
+    cache = CacheLinhas(str(tmp_path / "linhas.sqlite"), "teste")
+    for entrada in (dados, dados, (medidas, *dados[1:])):
+        esperado = analisar(*entrada, cache_linhas=None)
+        for a, b in zip(esperado, analisar(*entrada, cache_linhas=cache)):
+            pd.testing.assert_frame_equal(a.astype(str), b.astype(str))
@@ -0,0 +1,20 @@
+import io
+
+import openpyxl
+import pandas as pd
+import pytest
+
+import exportacao
+
+VAZIO = pd.DataFrame()
+
+
+def test_excel_acima_do_limite(monkeypatch):
+    # o xlsxwriter descartaria as linhas excedentes sem erro
+    monkeypatch.setattr(exportacao, "MAX_LINHAS_EXCEL", 11)
+    buffer = io.BytesIO()
+    exportacao.exportar(buffer, "xlsx", pd.DataFrame({"a": range(10)}), VAZIO, VAZIO, VAZIO)
+    assert openpyxl.load_workbook(buffer).worksheets[0].max_row == 11
+
+    with pytest.raises(ValueError, match="CSV ou Parquet"):
+        exportacao.exportar(io.BytesIO(), "xlsx", pd.DataFrame({"a": range(11)}), VAZIO, VAZIO, VAZIO)
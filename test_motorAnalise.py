@@ -0,0 +1,122 @@
+import hashlib
+
+import pandas as pd
+
+from dadosSinteticos import gerar_exportacao
+from motorAnalise import analisar
+
+# Resultados fixados com a implementação original (laço linha a linha, antes da vetorização,
+# do índice de alarmes e das regras em regras.json). Se algum destes testes mudar, a saída
+# da análise mudou.
+
+
+def _bordas():
+    medidas = pd.DataFrame({
+        "Nome": [
+            "SITE1/TM400 #1", "SITE1/TM400 #2", "SITE1/T100 #3", "SITE1/TC100 #12", "SITE1/TM100G #5",
+            "SITE1/TM100G #6", "SITE1/TM100G #7", "SITE1/XYZ #8", "SITE1/TCX12 #9", "SITE1/TM100G #10",
+        ],
+        "Tipo": [
+            "xFEC 7%", "Reed Solomon", "Taxa de FEC", "Taxa FEC corrigido", None,
+            "Pré-FEC BER", "Pré-FEC BER", "FEC", "Taxa FEC", "Potência RX",
+        ],
+        # decimais com vírgula, valor vazio e zeros
+        "Valor": ["0,00005", "0,001", "0", "0", "0,001", None, "0,002", "1", "0", "0"],
+        "Número de Série": ["A1", "A2", "sn-1", "SN 2", "A5", "A6", "A7", "A8", None, "A10"],
+    })
+    placas = pd.DataFrame({
+        "Numero de Serie": ["SN1", "SN2"],
+        "Em Teste": ["Sim", "Não"],
+    })
+    # o número da medida (#12) é prefixo do número da placa no alarme (#123)
+    alarmes = pd.DataFrame({
+        "Placa:": ["SITE1/TC100 #123", "SITE1/TM400 #1"],
+        "Alarme:": ["Equipamento não responde", "Potência RX baixa"],
+    })
+    supervisores = pd.DataFrame({
+        "NE": ["NE-1", "NE-2", "NE-3", "NE-4"],
+        "Placa": ["SPVL-4", "SPVL-91", "SPVL-2", "SPVL-HB"],
+        "Alarme": ["DCN link down", "Tempo de resposta excedido (SC)", "DCN link down", "Temperatura alta"],
+    })
+    return medidas, placas, alarmes, supervisores
+
+
+def _texto(df: pd.DataFrame, colunas: list) -> pd.DataFrame:
+    return df[colunas].astype(str).reset_index(drop=True)
+
+
+def test_casos_de_borda():
+    resultados, em_teste, sem_gerencia, supervisores = analisar(*_bordas(), cache_linhas=None)
+
+    pd.testing.assert_frame_equal(_texto(resultados, ["Nome", "Valor", "Análise de FEC"]), pd.DataFrame({
+        "Nome": ["SITE1/TM400 #1", "SITE1/TM400 #2", "SITE1/TM100G #7", "SITE1/TCX12 #9"],
+        "Valor": ["5e-05", "0.001", "0.002", "0.0"],
+        "Análise de FEC": [
+            "Recomendado para TM400", "Acima do recomendado para TM400",
+            "Acima do recomendado para TM100G", "Recomendado para TCX12",
+        ],
+    }))
+    pd.testing.assert_frame_equal(_texto(em_teste, ["Nome", "Análise de FEC"]), pd.DataFrame({
+        "Nome": ["SITE1/T100 #3"], "Análise de FEC": ["Placa em teste"],
+    }))
+    pd.testing.assert_frame_equal(_texto(sem_gerencia, ["Nome", "Alarme encontrado"]), pd.DataFrame({
+        "Nome": ["SITE1/TC100 #12"], "Alarme encontrado": ["EQUIPAMENTO NÃO RESPONDE"],
+    }))
+    assert "Análise de FEC" not in sem_gerencia.columns
+    pd.testing.assert_frame_equal(supervisores, pd.DataFrame({
+        "NE": ["NE-1", "NE-2"],
+        "Placa:": ["SPVL-4", "SPVL-91"],
+        "Análise": [
+            "Falha de Comunicacao, necessário verificar a conexão da placa com a rede DCN",
+            "Site sem gerenciamento, necessário verificar supervisor.",
+        ],
+    }))
+
+
+def test_entrada_nao_e_alterada():
+    entrada = _bordas()
+    copias = [df.copy() for df in entrada]
+    analisar(*entrada, cache_linhas=None)
+    for df, copia in zip(entrada, copias):
+        pd.testing.assert_frame_equal(df, copia)
+
+
+def _impressao(df: pd.DataFrame, colunas: list) -> tuple:
+    return len(df), hashlib.sha256(_texto(df, colunas).to_csv(index=False).encode()).hexdigest()[:16]
+
+
+# (linhas, sha256 do CSV das colunas) por saída, para gerar_exportacao(4000, seed=7)
+ESPERADO_SINTETICO = {
+    "resultados": (861, "7e8e8e888bd7034a"),
+    "em_teste": (3, "504da70c8c2c2e6c"),
+    "sem_gerencia": (13, "c427bebe8a6621be"),
+    "supervisores": (13, "dbff7f7b031d29a9"),
+}
+CONTAGEM_SINTETICO = {
+    "Acima do recomendado para T100": 21, "Acima do recomendado para T100DC": 44,
+    "Acima do recomendado para T100DCT": 28, "Acima do recomendado para TC100": 17,
+    "Acima do recomendado para TCX12": 20, "Acima do recomendado para TCX22-HA": 26,
+    "Acima do recomendado para TF100G": 7, "Acima do recomendado para TM100": 11,
+    "Acima do recomendado para TM100G": 7, "Acima do recomendado para TM400": 10,
+    "Acima do recomendado para TR100": 50, "Acima do recomendado para TT100G": 7,
+    "Recomendado para T100": 22, "Recomendado para T100DC": 95, "Recomendado para T100DCT": 70,
+    "Recomendado para TC100": 14, "Recomendado para TCX12": 24, "Recomendado para TCX22-HA": 28,
+    "Recomendado para TF100G": 46, "Recomendado para TM100": 56, "Recomendado para TM100G": 53,
+    "Recomendado para TM400": 39, "Recomendado para TR100": 126, "Recomendado para TT100G": 40,
+}
+
+
+def _conferir_sintetico(saidas):
+    resultados, em_teste, sem_gerencia, supervisores = saidas
+    assert {
+        "resultados": _impressao(resultados, ["Nome", "Análise de FEC"]),
+        "em_teste": _impressao(em_teste, ["Nome"]),
+        "sem_gerencia": _impressao(sem_gerencia, ["Nome", "Alarme encontrado"]),
+        "supervisores": _impressao(supervisores, ["NE", "Placa:", "Análise"]),
+    } == ESPERADO_SINTETICO
+    contagem = resultados["Análise de FEC"].astype(str).value_counts()
+    assert contagem[contagem > 0].sort_index().to_dict() == CONTAGEM_SINTETICO
+
+
+def test_exportacao_sintetica():
+    _conferir_sintetico(analisar(*gerar_exportacao(4000, seed=7), cache_linhas=None))
@@ -0,0 +1,52 @@
+import copy
+import json
+
+import pandas as pd
+import pytest
+
+from motorAnalise import analisar, analisar_supervisores
+from regras import ARQUIVO_REGRAS, Regras
+
+
+def _config() -> dict:
+    with open(ARQUIVO_REGRAS, encoding="utf-8") as f:
+        return copy.deepcopy(json.load(f))
+
+
+def _sem_gerencia(regras: Regras) -> pd.DataFrame:
+    medidas = pd.DataFrame({"Nome": ["SITE1/TC100 #12"], "Tipo": ["Taxa FEC"], "Valor": ["0"]})
+    placas = pd.DataFrame({"Placa": ["SITE1/TC100 #12"], "Alarme": ["Equipamento não responde"]})
+    return analisar(medidas, placas, cache_linhas=None, regras=regras)[2]
+
+
+SUPERVISORES = pd.DataFrame({
+    "NE": ["NE-1", "NE-2"],
+    "Placa": ["SPVL-4", "SPVL-91"],
+    "Alarme": ["DCN link down", "Tempo de resposta excedido (SC)"],
+})
+
+
+def test_listas_vazias_nao_sinalizam():
+    assert len(_sem_gerencia(Regras(_config()))) == 1
+    assert len(analisar_supervisores(SUPERVISORES, Regras(_config()))) == 2
+
+    config = _config()
+    config["supervisores"]["alarmes_dcn"] = []
+    config["supervisores"]["alarmes_site_sem_gerencia"] = []
+    config["alarmes_criticos"] = []
+    assert _sem_gerencia(Regras(config)).empty
+    assert analisar_supervisores(SUPERVISORES, Regras(config)).empty
+
+
+@pytest.mark.parametrize("alterar", [
+    lambda c: c.update(dispositivos=[]),
+    lambda c: c["limiares"][0].pop("limiar"),
+    lambda c: c["limiares"][0].pop("tipos"),
+    lambda c: c.update(versao=2),
+    lambda c: c["dispositivos"][0].update(padrao="("),
+])
+def test_regras_invalidas(alterar):
+    config = _config()
+    alterar(config)
+    with pytest.raises(ValueError):
+        Regras(config)
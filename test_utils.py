@@ -0,0 +1,66 @@
+import re
+import zipfile
+
+import openpyxl
+import pandas as pd
+import pytest
+
+import utils
+from utils import carregar_arquivo
+
+
+def _planilha(caminho, linhas, titulo=2):
+    # duas linhas de título antes do cabeçalho, como nas exportações do gerenciador
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    for i in range(titulo):
+        ws.append([f"Relatorio {i}"])
+    for linha in linhas:
+        ws.append(linha)
+    wb.save(caminho)
+    return caminho
+
+
+def _ler_igual_read_excel(caminho, **kw):
+    esperado = utils.compactar_texto(pd.read_excel(caminho, header=2, usecols=utils._usecols(kw.get("colunas"))))
+    lido = carregar_arquivo(caminho, header_linha=2, **kw)
+    pd.testing.assert_frame_equal(lido, esperado)
+    return lido
+
+
+def test_dimensao_errada_no_arquivo(tmp_path):
+    # o <dimension> gravado no XML da planilha não limita a leitura
+    origem = _planilha(tmp_path / "origem.xlsx", [["Nome", "Valor"]] + [[f"TM400 #{i}", i] for i in range(50)])
+    destino = tmp_path / "medidas.xlsx"
+    with zipfile.ZipFile(origem) as zin, zipfile.ZipFile(destino, "w") as zout:
+        for item in zin.infolist():
+            dados = zin.read(item.filename)
+            if item.filename == "xl/worksheets/sheet1.xml":
+                dados = re.sub(rb'<dimension ref="[^"]*"', b'<dimension ref="A1:B2"', dados)
+            zout.writestr(item, dados)
+    assert _ler_igual_read_excel(destino).shape == (50, 2)
+
+
+@pytest.mark.parametrize("bloco", [1, 4, 1000])
+def test_tipos_inferidos_na_coluna_inteira(tmp_path, monkeypatch, bloco):
+    # seriais só com dígitos no começo e texto no fim continuam texto (com os zeros à esquerda)
+    monkeypatch.setattr(utils, "TAMANHO_BLOCO", bloco)
+    seriais = [f"{i:05d}" for i in range(12, 513, 100)] + ["AB-77"]
+    linhas = [["Numero de Serie", "Em Teste"]] + [[s, "Sim"] for s in seriais]
+    lido = _ler_igual_read_excel(_planilha(tmp_path / "placas.xlsx", linhas))
+    assert lido["Numero de Serie"].tolist() == seriais
+
+
+def test_linhas_vazias_e_projecao(tmp_path):
+    linhas = [
+        ["Nome", "Valor", "Outra"],
+        ["a", 1, "x"],
+        [None, None, "y"],
+        [None, None, None],
+        ["b", 2.5, "z"],
+        [None, None, None],
+    ]
+    caminho = _planilha(tmp_path / "medidas.xlsx", linhas)
+    lido = _ler_igual_read_excel(caminho, colunas=["Nome", "Valor"])
+    assert list(lido.columns) == ["Nome", "Valor"]
+    assert len(lido) == 4
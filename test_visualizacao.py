@@ -0,0 +1,34 @@
+import pandas as pd
+from cachetools import LRUCache
+
+import visualizacao
+from visualizacao import filtrar, pagina
+
+
+def _quadro():
+    df = pd.DataFrame({"Nome": ["TM400 #1", "T100 #2", "TM400 #3"], "Tipo": ["FEC", "BER", "FEC"]})
+    df.attrs["chave_arquivo"] = "k"
+    return df
+
+
+def test_selecao_vazia_de_colunas():
+    # nenhuma coluna escolhida não é o mesmo que todas
+    df = _quadro()
+    assert list(pagina(df, 1, 25).columns) == ["Nome", "Tipo"]
+    assert list(pagina(df, 1, 25, colunas=[]).columns) == []
+    assert filtrar(df, "tm400").tolist() == [0, 2]
+    assert filtrar(df, "tm400", colunas=[]).tolist() == []
+
+
+def test_cache_de_filtros_limitado_por_bytes(monkeypatch):
+    monkeypatch.setattr(visualizacao, "_filtros", LRUCache(maxsize=16, getsizeof=lambda a: a.nbytes))
+    df = _quadro()
+    # 2 posições int64 = 16 bytes cabem; a busca seguinte tira a anterior
+    assert filtrar(df, "tm400").tolist() == [0, 2]
+    assert filtrar(df, "fec").tolist() == [0, 2]
+    assert len(visualizacao._filtros) == 1
+    # maior que o orçamento inteiro: calculada, mas não guardada
+    maior = pd.DataFrame({"Nome": ["a"] * 3})
+    maior.attrs["chave_arquivo"] = "g"
+    assert filtrar(maior, "a").tolist() == [0, 1, 2]
+    assert list(visualizacao._filtros) == [("k", ("Nome", "Tipo"), "fec")]
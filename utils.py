@@ -1,11 +1,209 @@
+import csv
+import os
 import pandas as pd
+import pyarrow as pa
+from pandas.io.parsers import TextParser
+from normalizacao import _norm_colname
 
-def carregar_arquivo(arquivo, header_linha=0):
+# colunas usadas pela análise (comparadas pelo nome normalizado; ver _usecols)
+COLUNAS_ANALISE = [
+    "Nome", "Valor", "Tipo", "Serie", "Serial",
+    "Em Teste", "EmTeste", "Em_Teste", "Placa", "Alarme", "NE",
+]
+
+TAMANHO_BLOCO = 100_000
+_AMOSTRA_CSV = 64 * 1024
+
+# texto das planilhas fica em Arrow: ocupa cerca de 1/3 dos objetos str do Python
+# e as operações .str (lower, contains, ...) rodam no Arrow
+TEXTO = pd.StringDtype("pyarrow")
+
+
+def _usecols(colunas):
+    # mantém a coluna se o nome normalizado for igual a um candidato ou contiver um
+    # candidato longo (nomes curtos como "NE" só valem por igualdade)
+    if colunas is None:
+        return None
+    cand = [_norm_colname(c) for c in colunas]
+    def manter(c) -> bool:
+        n = _norm_colname(c)
+        return any(w == n or (len(w) > 3 and w in n) for w in cand)
+    return manter
+
+def _extensao(arquivo, nome=None) -> str:
+    nome = nome or getattr(arquivo, "name", None) or str(arquivo)
+    return os.path.splitext(str(nome))[1].lower()
+
+def _detectar_separador(arquivo, header_linha: int) -> str:
+    # lê só o início do arquivo uma vez e usa o csv.Sniffer a partir da linha de cabeçalho
+    if isinstance(arquivo, (str, os.PathLike)):
+        with open(arquivo, "rb") as f:
+            amostra = f.read(_AMOSTRA_CSV)
+    else:
+        pos = arquivo.tell()
+        amostra = arquivo.read(_AMOSTRA_CSV)
+        arquivo.seek(pos)
+    if isinstance(amostra, bytes):
+        amostra = amostra.decode("utf-8", errors="replace")
+    linhas = amostra.splitlines()[header_linha:]
+    if len(linhas) > 1:
+        linhas = linhas[:-1]  # a última linha da amostra pode estar cortada
+    try:
+        return csv.Sniffer().sniff("\n".join(linhas), delimiters=",;\t|").delimiter
+    except csv.Error:
+        return ","
+
+def _tipo_texto(tipo: pa.DataType):
+    return TEXTO if pa.types.is_string(tipo) or pa.types.is_large_string(tipo) else None
+
+def _de_arrow(df: pd.DataFrame) -> pd.DataFrame:
+    # leitura com dtype_backend="pyarrow": o texto continua em Arrow (sem cópia) e números,
+    # datas e colunas vazias voltam para os tipos numpy de sempre
+    tabela = pa.Table.from_pandas(df, preserve_index=False).replace_schema_metadata(None)
+    return tabela.to_pandas(types_mapper=_tipo_texto)
+
+def compactar_texto(df: pd.DataFrame) -> pd.DataFrame:
+    # colunas object só com str (ex.: lidas pelo openpyxl) passam para string[pyarrow];
+    # colunas com tipos misturados ficam como estão
+    tipos = {
+        c: TEXTO for c in df.columns
+        if df[c].dtype == object and pd.api.types.infer_dtype(df[c], skipna=True) == "string"
+    }
+    return df.astype(tipos) if tipos else df
+
+def _rebobinar(arquivo):
+    if hasattr(arquivo, "seek"):
+        arquivo.seek(0)
+
+def _colunas_csv(arquivo, header_linha, sep, colunas):
+    # o engine pyarrow não aceita usecols como função: lê só o cabeçalho e resolve os nomes
+    if colunas is None:
+        return None
+    nomes = pd.read_csv(arquivo, header=header_linha, sep=sep, nrows=0, engine="c").columns
+    _rebobinar(arquivo)
+    manter = _usecols(colunas)
+    return [c for c in nomes if manter(c)]
+
+def _ler_csv(arquivo, header_linha, colunas, chunksize=None):
+    sep = _detectar_separador(arquivo, header_linha)
+    if chunksize is None:
+        try:
+            usecols = _colunas_csv(arquivo, header_linha, sep, colunas)
+            return _de_arrow(pd.read_csv(arquivo, header=header_linha, sep=sep, engine="pyarrow",
+                                         usecols=usecols, dtype_backend="pyarrow"))
+        except Exception:
+            # pyarrow indisponível ou arquivo que ele não aceita: cai para o parser C
+            _rebobinar(arquivo)
+    return pd.read_csv(arquivo, header=header_linha, sep=sep, engine="c",
+                       usecols=_usecols(colunas), chunksize=chunksize)
+
+def _cabecalho(valores) -> list:
+    # mesmos nomes que o read_excel geraria para células vazias e nomes repetidos
+    nomes, vistos = [], {}
+    for i, v in enumerate(valores):
+        nome = f"Unnamed: {i}" if v is None else v
+        if nome in vistos:
+            vistos[nome] += 1
+            nome = f"{nome}.{vistos[nome]}"
+        else:
+            vistos[nome] = 0
+        nomes.append(nome)
+    return nomes
+
+def _quadro(linhas: list, nomes: list) -> pd.DataFrame:
+    # inferência de tipos igual à do read_excel (TextParser: "" = NaN, números em texto viram número;
+    # linhas vazias no meio da planilha são mantidas)
+    if not linhas:
+        return pd.DataFrame(columns=nomes)
+    return TextParser(linhas, names=nomes, skip_blank_lines=False).read()
+
+def _inferir(df: pd.DataFrame) -> pd.DataFrame:
+    # inferência sobre a coluna inteira (como o read_excel), uma coluna por vez: inferir por
+    # bloco transformaria, p.ex., seriais "00012" em 12 só nos blocos sem texto
+    if df.empty:
+        return _quadro([], list(df.columns))
+    return pd.concat(
+        [_quadro(df.iloc[:, [i]].to_numpy().tolist(), [c]) for i, c in enumerate(df.columns)], axis=1
+    )
+
+def _celula(v):
+    # mesma conversão do leitor openpyxl do pandas: vazia = "" (vira NaN) e float inteiro = int
+    if v is None:
+        return ""
+    if isinstance(v, float) and v.is_integer():
+        return int(v)
+    return v
+
+def _iterar_xlsx(arquivo, header_linha, colunas, chunksize, inferir=True):
+    # inferir=False: blocos com os valores brutos (object), para inferir uma vez no final
+    from openpyxl import load_workbook
+
+    wb = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        planilha = wb.worksheets[0]
+        # a dimensão gravada no arquivo pode estar errada (o pandas também a descarta)
+        planilha.reset_dimensions()
+        linhas = planilha.iter_rows(values_only=True)
+        for _ in range(header_linha):
+            next(linhas, None)
+        cabecalho = _cabecalho(next(linhas, None) or [])
+        manter = _usecols(colunas)
+        indices = [i for i, c in enumerate(cabecalho) if manter is None or manter(c)]
+        nomes = [cabecalho[i] for i in indices]
+
+        def montar(linhas, nomes):
+            return _quadro(linhas, nomes) if inferir else pd.DataFrame(linhas, columns=nomes, dtype=object)
+        bloco, vazias, enviados = [], [], 0
+        for linha in linhas:
+            valores = [_celula(linha[i]) if i < len(linha) else "" for i in indices]
+            if all(v is None or v == "" for v in linha):
+                # linhas vazias só entram se aparecer dado depois (o read_excel descarta as do final)
+                vazias.append(valores)
+                continue
+            bloco.extend(vazias)
+            vazias = []
+            bloco.append(valores)
+            if len(bloco) >= chunksize:
+                yield montar(bloco, nomes)
+                enviados += 1
+                bloco = []
+        if bloco or not enviados:
+            # planilha sem linhas ainda gera um bloco vazio com o cabeçalho
+            yield montar(bloco, nomes)
+    finally:
+        wb.close()
+
+def iterar_arquivo(arquivo, header_linha=0, colunas=None, chunksize=TAMANHO_BLOCO, nome=None):
+    # lê o arquivo em blocos de até `chunksize` linhas, mantendo só as `colunas` pedidas
+    # (None = todas); a memória fica limitada ao bloco atual
+    if arquivo is None:
+        return
+    ext = _extensao(arquivo, nome)
+    if ext == ".xlsx":
+        blocos = _iterar_xlsx(arquivo, header_linha, colunas, chunksize)
+    elif ext == ".xls":
+        # formato antigo não tem leitura em streaming
+        df = pd.read_excel(arquivo, header=header_linha, usecols=_usecols(colunas))
+        blocos = (df.iloc[inicio:inicio + chunksize] for inicio in range(0, max(len(df), 1), chunksize))
+    elif ext == ".csv":
+        blocos = _ler_csv(arquivo, header_linha, colunas, chunksize=chunksize)
+    else:
+        raise ValueError("Tipo de arquivo não suportado.")
+    for bloco in blocos:
+        yield compactar_texto(bloco)
+
+def carregar_arquivo(arquivo, header_linha=0, colunas=None, nome=None):
     if arquivo is None:
         return None
-    if arquivo.name.endswith(".xlsx") or arquivo.name.endswith(".xls"):
-        return pd.read_excel(arquivo, header=header_linha)
-    elif arquivo.name.endswith(".csv"):
-        return pd.read_csv(arquivo, header=header_linha, sep=None, engine="python")
+    ext = _extensao(arquivo, nome)
+    if ext == ".xlsx":
+        # leitura em streaming (openpyxl read-only), já só com as colunas pedidas: a planilha
+        # inteira nunca fica em memória, só os blocos projetados; os tipos são inferidos no final
+        blocos = list(_iterar_xlsx(arquivo, header_linha, colunas, TAMANHO_BLOCO, inferir=False))
+        return compactar_texto(_inferir(pd.concat(blocos, ignore_index=True) if len(blocos) > 1 else blocos[0]))
+    elif ext == ".xls":
+        return compactar_texto(pd.read_excel(arquivo, header=header_linha, usecols=_usecols(colunas)))
+    elif ext == ".csv":
+        return compactar_texto(_ler_csv(arquivo, header_linha, colunas))
     else:
         raise ValueError("Tipo de arquivo não suportado.")
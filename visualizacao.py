@@ -0,0 +1,101 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+from cachetools import LRUCache
+
+from motorAnalise import identificar_dispositivos
+from regras import regras_atuais
+
+# Prévia paginada dos arquivos carregados: só a fatia visível vai para o navegador.
+# Resumo e filtros ficam em cache pela chave de conteúdo do arquivo (df.attrs["chave_arquivo"],
+# preenchida por cacheArquivos.ler_planilhas), então mudar de página não refaz nada.
+
+TAMANHOS_PAGINA = [25, 50, 100, 500]
+# Orçamento de memória (MB) das buscas em cache (posições das linhas encontradas)
+FILTROS_MB = int(os.environ.get("VISUALIZACAO_FILTROS_MB", "128"))
+
+_resumos = LRUCache(maxsize=32)
+# limitado por bytes: a busca num arquivo de milhões de linhas guarda milhões de posições
+_filtros = LRUCache(maxsize=FILTROS_MB * 1024 * 1024, getsizeof=lambda a: a.nbytes)
+_lock = threading.Lock()
+
+
+def _em_cache(cache: LRUCache, chave, calcular):
+    if chave is None or chave[0] is None:
+        return calcular()
+    with _lock:
+        valor = cache.get(chave)
+    if valor is None:
+        valor = calcular()
+        with _lock:
+            try:
+                cache[chave] = valor
+            except ValueError:
+                # maior que o orçamento inteiro do cache: não guarda
+                pass
+    return valor
+
+
+def _calcular_resumo(df: pd.DataFrame) -> dict:
+    resumo = {
+        "linhas": len(df),
+        "colunas": len(df.columns),
+        "memoria_mb": df.memory_usage(deep=True).sum() / 2**20,
+        "vazios": df.isna().sum().rename("Vazios"),
+        "dispositivos": None,
+    }
+    if "Nome" in df.columns:
+        dispositivos, _ = identificar_dispositivos(df["Nome"], regras_atuais().padroes)
+        contagem = (
+            dispositivos.cat.add_categories("(não identificado)").fillna("(não identificado)")
+            .value_counts().rename_axis("Dispositivo").rename("Linhas")
+        )
+        resumo["dispositivos"] = contagem[contagem > 0]
+    return resumo
+
+
+def resumo(df: pd.DataFrame) -> dict:
+    # linhas, colunas, memória, vazios por coluna e linhas por dispositivo (se houver "Nome")
+    return _em_cache(_resumos, (df.attrs.get("chave_arquivo"),), lambda: _calcular_resumo(df))
+
+
+def _contem(coluna: pd.Series, termo: str) -> np.ndarray:
+    # busca só nos valores distintos e espalha o resultado pelos códigos
+    codigos, unicos = pd.factorize(coluna, use_na_sentinel=True)
+    achou = pd.Index(unicos).astype(str).str.contains(termo, case=False, regex=False)
+    return np.append(np.asarray(achou, dtype=bool), False)[codigos]
+
+
+def _calcular_filtro(df: pd.DataFrame, colunas: tuple, termo: str) -> np.ndarray:
+    mascara = np.zeros(len(df), dtype=bool)
+    for coluna in colunas:
+        mascara |= _contem(df[coluna], termo)
+    return np.flatnonzero(mascara)
+
+
+def filtrar(df: pd.DataFrame, termo: str, colunas=None) -> np.ndarray | None:
+    # posições das linhas com `termo` (sem distinção de maiúsculas) em alguma das colunas
+    # (None = todas); None quando não há filtro
+    termo = (termo or "").strip()
+    if not termo:
+        return None
+    colunas = tuple(df.columns if colunas is None else colunas)
+    return _em_cache(
+        _filtros, (df.attrs.get("chave_arquivo"), colunas, termo),
+        lambda: _calcular_filtro(df, colunas, termo),
+    )
+
+
+def total_paginas(linhas: int, tamanho: int) -> int:
+    return max(1, -(-linhas // tamanho))
+
+
+def pagina(df: pd.DataFrame, numero: int, tamanho: int, colunas=None, posicoes=None) -> pd.DataFrame:
+    # fatia `numero` (a partir de 1) das linhas filtradas, só com as colunas pedidas (None = todas)
+    inicio = (numero - 1) * tamanho
+    if posicoes is None:
+        fatia = df.iloc[inicio:inicio + tamanho]
+    else:
+        fatia = df.iloc[posicoes[inicio:inicio + tamanho]]
+    return fatia if colunas is None else fatia[list(colunas)]